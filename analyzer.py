@@ -1,7 +1,25 @@
+import os
+import shutil
 import pandas as pd
+from instrumentation import METRICS
+
+OUTPUT_FORMATS = ("csv", "parquet", "both")
+
+# Low-cardinality columns of the metadata, enriched and categorized frames
+CATEGORY_COLUMNS = [
+    "priority", "type", "group_id", "current_issue_type", "ticket_type", "issue_type",
+    "Current Ticket Type", "Ticket Type (Auto Tagged)", "Priority (Auto Tagged)",
+    "Current Issue Type", "Issue Type (Auto Tagged)", "Category", "Priority", "Type",
+]
+
+def compact_dtypes(df):
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    return df
 
 def analyze_tickets(tickets):
-    df = pd.DataFrame(tickets)
+    df = compact_dtypes(pd.DataFrame(tickets))
 
     print(f"\nTotal tickets: {len(df)}")
 
@@ -18,3 +36,45 @@ def analyze_tickets(tickets):
         print(df['issue_type'].value_counts())
 
     return df
+
+def analyze_tags(enriched):
+    # Auto-tagged breakdowns of the same tickets analyze_tickets counted
+    for column, label in [
+        ("Ticket Type (Auto Tagged)", "Ticket Type"),
+        ("Issue Type (Auto Tagged)", "Issue Type"),
+    ]:
+        if column in enriched.columns:
+            print(f"\nTickets by {label} (auto tagged):")
+            print(enriched[column].value_counts())
+
+def write_parquet(df, out_dir, created_col="created_at", partition_by="month"):
+    out = compact_dtypes(df.copy())
+    partition_cols = None
+    if created_col in out.columns:
+        raw = out[created_col].astype("string")
+        out[created_col] = pd.to_datetime(raw, errors="coerce", utc=True, format="ISO8601")
+        if partition_by == "month":
+            # Partition on the ticket's own local month rather than the UTC one
+            out["created_month"] = raw.str.slice(0, 7).where(out[created_col].notna(), "unknown")
+            partition_cols = ["created_month"]
+    if partition_by and partition_by != "month":
+        partition_cols = [partition_by]
+
+    # Replace the dataset like the dated CSVs are replaced, instead of appending part files
+    if os.path.isdir(out_dir):
+        shutil.rmtree(out_dir)
+    out.to_parquet(out_dir, engine="pyarrow", index=False, partition_cols=partition_cols)
+    return out_dir
+
+def write_output(df, base_name, output_format="csv", created_col="created_at"):
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format {output_format!r}, expected one of {OUTPUT_FORMATS}")
+    paths = []
+    with METRICS.stage("write"):
+        if output_format in ("csv", "both"):
+            df.to_csv(f"{base_name}.csv", index=False)
+            paths.append(f"{base_name}.csv")
+        if output_format in ("parquet", "both"):
+            paths.append(write_parquet(df, f"{base_name}.parquet", created_col=created_col))
+        METRICS.count("rows_written", len(df) * len(paths))
+    return paths
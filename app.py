@@ -2,23 +2,23 @@
 import streamlit as st
 import pandas as pd
 import os
-import zipfile
 import datetime
-import shutil
+import hashlib
+import tempfile
 from pathlib import Path
-from parser import parse_ticket_xml
-from analyzer import analyze_tickets
-from conversation_analyzer import generate_insights
+from parser import iter_zip_xmls
+from pipeline import run_pipeline
+from ticket_store import TicketStore, STORE_PATH
+from trend_clusters import CLUSTER_MODEL_PATH, cluster_label, load_labels
+from instrumentation import Metrics, use_metrics
+from rule_engine import RULES
+from trend_windows import last_n_days, week_over_week, detect_spikes
 
 st.set_page_config(page_title="Customer Support Ticket Analyzer", page_icon="🎟️", layout="wide")
 st.title("🎟️ Customer Support Ticket Analyzer")
 st.caption("Analyze Freshdesk XML ticket exports and uncover trends easily 🚀")
 st.markdown("---")
 
-UPLOAD_FOLDER = "uploaded_xmls"
-if not os.path.exists(UPLOAD_FOLDER):
-    os.makedirs(UPLOAD_FOLDER)
-
 # Group ID to Name mapping
 group_options = {
     "17000127117": "App Integration",
@@ -55,11 +55,55 @@ group_options = {
 }
 
 # Upload
-def save_file(uploaded_file):
-    file_path = os.path.join(UPLOAD_FOLDER, uploaded_file.name)
-    with open(file_path, "wb") as f:
-        f.write(uploaded_file.getbuffer())
-    return file_path
+def upload_sources(uploaded_files, skipped):
+    # XML uploads are parsed in place and ZIP members are streamed out of the archive,
+    # so nothing is written to or extracted onto disk
+    for uploaded_file in uploaded_files:
+        uploaded_file.seek(0)
+        if uploaded_file.name.endswith(".zip"):
+            yield from iter_zip_xmls(uploaded_file, skipped)
+        else:
+            yield uploaded_file
+
+def upload_key(uploaded_files):
+    # Each upload is hashed once per session; later reruns reuse its digest
+    file_hashes = st.session_state.setdefault("upload_hashes", {})
+    digest = hashlib.sha256()
+    for uploaded_file in uploaded_files:
+        if uploaded_file.file_id not in file_hashes:
+            file_hashes[uploaded_file.file_id] = hashlib.sha256(uploaded_file.getvalue()).hexdigest()
+        digest.update(uploaded_file.name.encode("utf-8"))
+        digest.update(file_hashes[uploaded_file.file_id].encode("utf-8"))
+    return digest.hexdigest()
+
+REPORT_FILES = [
+    ("enriched", "text/csv"),
+    ("insights", "text/plain"),
+    ("categorized", "text/csv"),
+    ("unmatched", "text/plain"),
+]
+
+# Keyed on the upload content hash: reruns caused by widget changes reuse the parsed
+# tickets and generated reports instead of re-parsing and re-summarizing everything.
+# The rules version is part of the key, so editing tagging_rules.json re-tags on the next rerun.
+@st.cache_data(max_entries=4, show_spinner="Analyzing tickets...")
+def analyze_uploads(key, dedup, rules_version, _uploaded_files):
+    skipped = []
+    # Reports are written to a scratch folder and metrics to a Metrics of their own per run,
+    # so concurrent sessions never share files or counters.
+    # Uploads are also ingested into the ticket store, so they show up in the history search.
+    with use_metrics(Metrics()) as metrics, tempfile.TemporaryDirectory() as output_dir:
+        result = run_pipeline(upload_sources(_uploaded_files, skipped), output_dir=output_dir,
+                              store_path=STORE_PATH, cluster_model_path=CLUSTER_MODEL_PATH, dedup=dedup)
+        reports = {}
+        for report, mime in REPORT_FILES:
+            if report in result["outputs"]:
+                path = result["outputs"][report][0]
+                reports[report] = (os.path.basename(path), Path(path).read_bytes(), mime)
+    return {
+        "today": result["today"], "tickets": result["tickets"], "failures": skipped + result["failures"],
+        "reports": reports, "metrics": metrics.summary(),
+    }
 
 st.subheader("📂 Upload XML Files (you can upload a ZIP of multiple XMLs)")
 uploaded_files = st.file_uploader("Drag and drop files here", type=["xml", "zip"], accept_multiple_files=True)
@@ -74,71 +118,134 @@ ticket_type_options = [
     "Bug", "Query", "Training", "Automation", "WhatsApp Setup", "Webhooks", "Dashboard Access"
 ]
 selected_types = st.multiselect("🎯 Select Ticket Types to Include", options=["All"] + ticket_type_options, default=["All"])
+selected_ids = [gid for gid, name in group_options.items() if name in group_selection]
 
-# Clear upload folder before saving new files
-for file in os.listdir(UPLOAD_FOLDER):
-    file_path = os.path.join(UPLOAD_FOLDER, file)
-    if os.path.isfile(file_path):
-        os.remove(file_path)
-    elif os.path.isdir(file_path):
-        shutil.rmtree(file_path)
-
-# Save uploaded files
-valid_files = []
-if uploaded_files:
-    for uploaded_file in uploaded_files:
-        path = save_file(uploaded_file)
-        if uploaded_file.name.endswith(".zip"):
-            with zipfile.ZipFile(path, "r") as zip_ref:
-                zip_ref.extractall(UPLOAD_FOLDER)
-        else:
-            valid_files.append(path)
+dedup = st.checkbox("🧹 Collapse near-duplicate tickets (alert storms) before enrichment")
 
 analyze_btn = st.button("🚀 Analyze Tickets")
 
-if analyze_btn and uploaded_files:
-    all_tickets = []
-    for file in os.listdir(UPLOAD_FOLDER):
-        if file.endswith(".xml"):
-            full_path = os.path.join(UPLOAD_FOLDER, file)
-            all_tickets.extend(parse_ticket_xml(full_path))
+key = upload_key(uploaded_files) if uploaded_files else None
+if analyze_btn and key:
+    st.session_state["analyzed_key"] = key
 
-    if all_tickets:
+# Once analyzed, filter changes only re-filter the cached frame
+if key and st.session_state.get("analyzed_key") == key:
+    analysis = analyze_uploads(key, dedup, RULES.version(), uploaded_files)
+    if analysis["failures"]:
+        st.warning("⚠️ Some files were skipped or could not be parsed:\n" + "\n".join(
+            f"- {os.path.basename(path)}: {error}" for path, error in analysis["failures"]
+        ))
+
+    all_tickets = analysis["tickets"]
+    if not all_tickets.empty:
         # Filter by selected Group(s) and Ticket Type(s)
-        selected_ids = [gid for gid, name in group_options.items() if name in group_selection]
-        filtered_tickets = [
-            ticket for ticket in all_tickets
-            if (
-                "All" in group_selection or ticket["group_id"] in selected_ids
-            ) and (
-                "All" in selected_types or ticket.get("type") in selected_types
-            )
-        ]
-
-        df = pd.DataFrame(filtered_tickets)
-        today = datetime.datetime.now().strftime("%Y%m%d")
-        csv_file = f"ticket_analysis_output_{today}.csv"
-        df.to_csv(csv_file, index=False)
-
-        generate_insights(UPLOAD_FOLDER)
+        mask = pd.Series(True, index=all_tickets.index)
+        if "All" not in group_selection:
+            mask &= all_tickets["group_id"].isin(selected_ids)
+        if "All" not in selected_types:
+            mask &= all_tickets["type"].isin(selected_types)
+        df = all_tickets[mask]
+
+        today = analysis["today"]
+        csv_file = f"ticket_metadata_{today}.csv"
 
         st.success("✅ Analysis complete! Download your results below.")
         st.markdown("## 📥 Download Results")
 
-        st.download_button("📄 Ticket Data CSV", data=open(csv_file, "rb").read(), file_name=csv_file, mime="text/csv")
+        st.download_button("📄 Ticket Data CSV", data=df.to_csv(index=False).encode("utf-8"), file_name=csv_file, mime="text/csv")
 
-        insights_path = f"insights_report_{today}.txt"
-        if Path(insights_path).exists():
-            st.download_button("🧠 Insights Report", data=open(insights_path, "rb").read(), file_name=insights_path, mime="text/plain")
-
-        cat_map = f"categorized_ticket_map_{today}.csv"
-        if Path(cat_map).exists():
-            st.download_button("📊 Categorized Ticket Map", data=open(cat_map, "rb").read(), file_name=cat_map, mime="text/csv")
-
-        unmatched_file = f"unmatched_samples_{today}.txt"
-        if Path(unmatched_file).exists():
-            st.download_button("❓ Unmatched Issues", data=open(unmatched_file, "rb").read(), file_name=unmatched_file, mime="text/plain")
+        labels = {
+            "enriched": "🧾 Enriched Ticket Data",
+            "insights": "🧠 Insights Report",
+            "categorized": "📊 Categorized Ticket Map",
+            "unmatched": "❓ Unmatched Issues",
+        }
+        for report, label in labels.items():
+            if report in analysis["reports"]:
+                name, data, mime = analysis["reports"][report]
+                st.download_button(label, data=data, file_name=name, mime=mime)
 
         st.caption("Reports are generated based on uploaded Freshdesk XML ticket exports.")
+
+        # Same numbers main.py writes to run_summary_<date>.json
+        metrics = analysis["metrics"]
+        with st.expander("⏱️ Run Metrics"):
+            counters = metrics["counters"]
+            cols = st.columns(5)
+            cols[0].metric("Run time", f"{metrics['wall_seconds']}s")
+            cols[1].metric("Tickets / sec", metrics["tickets_per_second"] or 0)
+            cols[2].metric("MB read", round(counters.get("bytes_read", 0) / 1e6, 2))
+            cols[3].metric("LLM calls", counters.get("llm_calls", 0))
+            cols[4].metric("Summary cache hits", counters.get("summary_cache_hits", 0))
+            st.dataframe(pd.DataFrame.from_dict(metrics["stages"], orient="index"))
+            if metrics["latencies"]:
+                st.dataframe(pd.DataFrame.from_dict(metrics["latencies"], orient="index"))
     else:
         st.error("❌ No valid tickets found. Please check your XML files.")
+
+@st.cache_resource
+def get_store():
+    return TicketStore(STORE_PATH)
+
+# Reloaded only when a pipeline run has saved a newer cluster model
+@st.cache_data(max_entries=1)
+def get_cluster_labels(mtime):
+    return load_labels(CLUSTER_MODEL_PATH)
+
+# History lookups are answered by the store's indexes, without touching any XML
+if Path(STORE_PATH).exists():
+    st.markdown("---")
+    st.subheader("🔎 Search Ticket History")
+    search_text = st.text_input("Full-text search in subject, description and agent notes")
+    last_days = st.number_input("Created in the last N days (0 = all time)", min_value=0, value=0, step=1)
+
+    filters = {
+        "group_ids": None if "All" in group_selection else selected_ids,
+        "types": None if "All" in selected_types else selected_types,
+        "text": search_text,
+    }
+    if last_days:
+        since = datetime.datetime.utcnow() - datetime.timedelta(days=int(last_days))
+        filters["since"] = since.strftime("%Y-%m-%d %H:%M:%S")
+
+    store = get_store()
+    st.metric("Matching tickets", store.count(**filters))
+    trend_counts = store.count_by("trend_category", **filters)
+    if trend_counts:
+        st.bar_chart(pd.DataFrame(
+            [(category or "Unmatched", n) for category, n in trend_counts], columns=["Category", "Tickets"]
+        ).set_index("Category"))
+    if Path(CLUSTER_MODEL_PATH).exists():
+        cluster_labels = get_cluster_labels(os.path.getmtime(CLUSTER_MODEL_PATH))
+        cluster_counts = store.count_by("trend_cluster", **filters)
+        if cluster_counts:
+            st.caption("Semantic clusters (auto-labelled from ticket text)")
+            st.bar_chart(pd.DataFrame(
+                [(cluster_label(cluster_id, cluster_labels), n) for cluster_id, n in cluster_counts],
+                columns=["Cluster", "Tickets"],
+            ).groupby("Cluster").sum())
+
+    # Windowed trends come from the store's rollups (category x group x priority x day/week)
+    st.markdown("#### 📈 Trend Windows")
+    rollup_groups = filters["group_ids"]
+    window_days = int(last_days) or 7
+    spikes = detect_spikes(store, group_ids=rollup_groups)
+    for category, current, baseline, score in spikes:
+        st.warning(f"⚠️ {category}: {current} tickets in the last 7 days vs a baseline of {baseline}/week (z = {score})")
+    cols = st.columns(2)
+    cols[0].caption(f"Tickets per category, last {window_days} days of data")
+    cols[0].dataframe(pd.DataFrame(
+        last_n_days(store, window_days, group_ids=rollup_groups), columns=["Category", "Tickets"]
+    ))
+    cols[1].caption("Last 7 days vs previous 7 days")
+    cols[1].dataframe(pd.DataFrame(
+        week_over_week(store, group_ids=rollup_groups), columns=["Category", "Last 7 days", "Previous 7 days", "Change %"]
+    ))
+    weekly = store.rollup_counts("period_start", period="week", group_ids=rollup_groups)
+    if weekly:
+        st.line_chart(pd.DataFrame(weekly, columns=["Week", "Tickets"]).sort_values("Week").set_index("Week"))
+
+    st.dataframe(store.query(limit=500, **filters)[[
+        "ticket_id", "subject", "created_at", "priority", "group_id", "type",
+        "ticket_type_tagged", "issue_type_tagged", "trend_category", "trend_cluster", "summary_problem",
+    ]])
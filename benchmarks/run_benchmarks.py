@@ -0,0 +1,175 @@
+# run_benchmarks.py
+#
+# Per-stage timings, throughput and peak RSS of pipeline.run_pipeline on synthetic exports.
+#
+#   python benchmarks/run_benchmarks.py --sizes 1000 100000
+#   python benchmarks/run_benchmarks.py --sizes 1000 --save-baseline
+#   python benchmarks/run_benchmarks.py --sizes 1000 --compare      # exit code 1 on regression
+#
+# Each size runs in its own subprocess so peak RSS is measured per size.
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import types
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+DATA_DIR = os.path.join(BENCH_DIR, "data")
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+# Stages recorded in the run's Metrics; "pipeline" is the wall time of the whole run
+STAGES = ["parse", "dedup", "tag", "trend", "cluster", "summarize", "store", "write"]
+TICKETS_PER_FILE = 10000
+
+
+class StubChatClient:
+    """Stands in for openai.ChatCompletion; returns a canned summary after `latency` seconds."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+
+    def create(self, model, messages, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        content = "Stub summary: " + messages[-1]["content"][:60]
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=types.SimpleNamespace(content=content))])
+
+
+def export_paths(tickets, seed):
+    from synthetic_export import write_export
+    out_dir = os.path.join(DATA_DIR, f"{tickets}_seed{seed}")
+    files = max(1, -(-tickets // TICKETS_PER_FILE))
+    expected = [os.path.join(out_dir, f"export_{i:04d}.xml") for i in range(files)]
+    if not all(os.path.exists(path) for path in expected):
+        write_export(out_dir, tickets, files=files, seed=seed)
+    return expected
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_single(tickets, seed, llm_latency, workers=1):
+    from instrumentation import Metrics, use_metrics
+    from pipeline import run_pipeline
+
+    paths = export_paths(tickets, seed)
+    with tempfile.TemporaryDirectory() as workdir:
+        # The shipped path end to end (manifest, dedup, clustering, the store and its rollup
+        # triggers, every artifact), with the summary cache and all state in a fresh folder
+        os.chdir(workdir)
+        with use_metrics(Metrics()) as metrics:
+            run_pipeline(
+                paths, output_dir="out", workers=workers, client=StubChatClient(llm_latency),
+                manifest_path="ticket_manifest.db", output_format="both", store_path="ticket_store.db",
+                cluster_model_path="trend_clusters.pkl", dedup=True,
+            )
+        summary = metrics.summary()
+        os.chdir(BENCH_DIR)
+
+    count = summary["counters"].get("tickets", 0)
+    seconds = {stage: summary["stages"].get(stage, {}).get("seconds", 0.0) for stage in STAGES}
+    total = summary["stages"]["pipeline"]["seconds"]
+    return {
+        "tickets": count,
+        "bytes": sum(os.path.getsize(path) for path in paths),
+        "seconds": seconds,
+        "tickets_per_second": {stage: round(count / seconds[stage], 1) if seconds[stage] else None for stage in STAGES},
+        "total_seconds": total,
+        "total_tickets_per_second": round(count / total, 1) if total else None,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "counters": summary["counters"],
+    }
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for size, current in results.items():
+        base = baseline.get(size)
+        if not base:
+            continue
+        checks = [("total", current["total_tickets_per_second"], base["total_tickets_per_second"])]
+        checks += [
+            (stage, current["tickets_per_second"][stage], base["tickets_per_second"].get(stage))
+            for stage in STAGES
+        ]
+        for name, now, before in checks:
+            if now and before and now < before * (1 - tolerance):
+                regressions.append(f"{size} tickets, {name}: {now:.0f}/s vs baseline {before:.0f}/s")
+        if current["peak_rss_mb"] > base["peak_rss_mb"] * (1 + tolerance):
+            regressions.append(
+                f"{size} tickets, peak RSS: {current['peak_rss_mb']} MB vs baseline {base['peak_rss_mb']} MB"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the ticket pipeline on synthetic exports")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000], help="ticket counts, e.g. 1000 100000 1000000")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="simulated latency of each stub GPT call")
+    parser.add_argument("--workers", type=int, default=1, help="files parsed in parallel")
+    parser.add_argument("--save-baseline", action="store_true", help=f"store the results in {BASELINE_PATH}")
+    parser.add_argument("--compare", action="store_true", help="flag regressions against the stored baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative slowdown before flagging")
+    parser.add_argument("--output", help="also write the results JSON to this path")
+    parser.add_argument("--single", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        print(json.dumps(run_single(args.single, args.seed, args.llm_latency_ms / 1000, args.workers)))
+        return 0
+
+    results = {}
+    for size in args.sizes:
+        proc = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--single", str(size),
+             "--seed", str(args.seed), "--llm-latency-ms", str(args.llm_latency_ms), "--workers", str(args.workers)],
+            capture_output=True, text=True, check=True, cwd=BENCH_DIR,
+        )
+        results[str(size)] = json.loads(proc.stdout.strip().splitlines()[-1])
+        result = results[str(size)]
+        print(f"\n{size} tickets ({result['bytes'] / 1e6:.1f} MB), peak RSS {result['peak_rss_mb']} MB")
+        for stage in STAGES:
+            print(f"  {stage:<10} {result['seconds'][stage]:>9.3f}s  {result['tickets_per_second'][stage] or 0:>12.1f} tickets/s")
+        print(f"  {'total':<10} {result['total_seconds']:>9.3f}s  {result['total_tickets_per_second'] or 0:>12.1f} tickets/s")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(BASELINE_PATH):
+            with open(BASELINE_PATH) as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(baseline, f, indent=2)
+        print(f"\n✅ Baseline saved to {BASELINE_PATH}")
+
+    if args.compare:
+        if not os.path.exists(BASELINE_PATH):
+            print(f"\n❌ No baseline at {BASELINE_PATH}; run with --save-baseline first")
+            return 1
+        with open(BASELINE_PATH) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("\n❌ Regressions against baseline:")
+            for line in regressions:
+                print(f"   - {line}")
+            return 1
+        print("\n✅ No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
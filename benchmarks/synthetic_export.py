@@ -0,0 +1,140 @@
+# synthetic_export.py
+#
+# Seeded generator of Freshdesk-style <helpdesk-tickets> XML exports for benchmarking.
+#
+#   python benchmarks/synthetic_export.py --tickets 100000 --files 10 --out benchmarks/data/100k
+
+import argparse
+import datetime
+import os
+import random
+from xml.sax.saxutils import escape
+
+GROUP_IDS = [
+    "17000127117", "17000123004", "17000110678", "17000127820", "17000120858",
+    "17000124233", "17000119961", "17000123941", "17000118813", "17000126857",
+    "17000128876", "17000130127", "",
+]
+TICKET_TYPES = ["Campaign Execution", "Integration", "Onboarding", "Billing", "Support", "Bug", "Query", ""]
+ISSUE_TYPES = ["Configuration", "Enhancement", "Integration", "Knowledge", "Query", "Tech", ""]
+
+SUBJECTS = [
+    "SMS not delivered to {operator} numbers",
+    "Campaign not running for segment {segment}",
+    "Webhook callback not firing for message id {num}",
+    "Live feed dashboard not showing data",
+    "Invoice for {month} not received",
+    "Request for campaign wise report",
+    "WhatsApp template rejected by WABA",
+    "Domain reputation dropped, IP listed on RBL",
+    "Order OR - {num} has been submitted for approval from country India",
+    "Alert for DLT URL failure error {date}",
+    "API returns 403 unauthorized with valid token",
+    "Hard bounce rate increased on {domain}",
+    "Unable to login, access denied",
+    "Need data export in CSV for last month",
+    "DKIM and DMARC not configured for {domain}",
+    "Push notification not received on Android app",
+    "Re: Ticket {num}",
+    "Admin",
+]
+SENTENCES = [
+    "The customer reported that messages sent via {operator} are failing since yesterday.",
+    "Delivery report shows status failed for most of the numbers, retry also failed.",
+    "Please check why the campaign is not running even though the audience criteria are met.",
+    "We configured the webhook 2.0 endpoint but the callback is not received.",
+    "The report is missing open rate and click rate metrics.",
+    "Template was approved earlier but is now blocked and restricted.",
+    "Our domain is showing in a blacklist and bounce rate is high.",
+    "Kindly share the invoice and billing details for the payment raised.",
+    "This is an automated alert, no action needed from the customer.",
+    "Customer asked for clarification on how to upload the file.",
+    "Upload failed with an error, csv not uploading to the panel.",
+    "The button is not working and the screen is blank after login.",
+    "Please treat this as urgent, the client is escalating.",
+    "Attached are the screenshots and the API request payload.",
+]
+NOTES = [
+    "Hi team, we have checked and the issue was due to a wrong setting on the account.",
+    "This was an api error on our side, a code fix has been deployed.",
+    "Shared the documentation link, customer was not aware of the feature.",
+    "Everything okay now, working fine from our end. Closing the ticket.",
+    "Raised this as a feature request with the product team.",
+    "There was an outage in the SMS gateway, now resolved.",
+    "The webhook failed because the endpoint returned 500, asked customer to fix.",
+    "Can I get the campaign id so we can check further?",
+    "Moved to the internal task queue as the next step.",
+    "",
+]
+OPERATORS = ["Airtel", "Jio", "Vodafone", "BSNL"]
+DOMAINS = ["example.com", "mail.shop.in", "news.brand.co"]
+MONTHS = ["January", "February", "March", "April", "May", "June"]
+
+
+def _fill(template, rng, when):
+    return template.format(
+        operator=rng.choice(OPERATORS),
+        segment=f"SEG-{rng.randint(1, 500)}",
+        num=rng.randint(100000, 999999),
+        month=rng.choice(MONTHS),
+        date=when.strftime("%Y%m%d"),
+        domain=rng.choice(DOMAINS),
+    )
+
+
+def _ticket_xml(display_id, rng, start):
+    when = start + datetime.timedelta(seconds=rng.randint(0, 365 * 24 * 3600))
+    updated = when + datetime.timedelta(minutes=rng.randint(1, 7 * 24 * 60))
+    subject = _fill(rng.choice(SUBJECTS), rng, when)
+    description = " ".join(_fill(rng.choice(SENTENCES), rng, when) for _ in range(rng.randint(1, 6)))
+    notes = "".join(
+        f"<helpdesk-note><body>{escape(_fill(rng.choice(NOTES), rng, when))}</body></helpdesk-note>"
+        for _ in range(rng.randint(0, 4))
+    )
+    ticket_type = rng.choice(TICKET_TYPES)
+    stamp = "%Y-%m-%dT%H:%M:%S+05:30"
+    return (
+        "<helpdesk-ticket>"
+        f"<display-id>{display_id}</display-id>"
+        f"<subject>{escape(subject)}</subject>"
+        f"<description>{escape(description)}</description>"
+        f"<created-at>{when.strftime(stamp)}</created-at>"
+        f"<updated-at>{updated.strftime(stamp)}</updated-at>"
+        f"<priority>{rng.randint(1, 4)}</priority>"
+        + (f"<type>{ticket_type}</type>" if ticket_type else "")
+        + f"<group-id>{rng.choice(GROUP_IDS)}</group-id>"
+        f"<custom_field><cf_issue_type_430969>{rng.choice(ISSUE_TYPES)}</cf_issue_type_430969></custom_field>"
+        f"<notes>{notes}</notes>"
+        "</helpdesk-ticket>\n"
+    )
+
+
+def write_export(out_dir, tickets, files=1, seed=0, first_id=4000000):
+    """Write `tickets` tickets split over `files` XML files; returns the file paths."""
+    rng = random.Random(seed)
+    start = datetime.datetime(2024, 1, 1)
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    per_file = -(-tickets // files)
+    display_id = first_id
+    for index in range(files):
+        path = os.path.join(out_dir, f"export_{index:04d}.xml")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write('<?xml version="1.0" encoding="UTF-8"?>\n<helpdesk-tickets type="array">\n')
+            for _ in range(min(per_file, tickets - (display_id - first_id))):
+                f.write(_ticket_xml(display_id, rng, start))
+                display_id += 1
+            f.write("</helpdesk-tickets>\n")
+        paths.append(path)
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic Freshdesk XML export")
+    parser.add_argument("--tickets", type=int, default=1000)
+    parser.add_argument("--files", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="benchmarks/data/synthetic")
+    args = parser.parse_args()
+    for path in write_export(args.out, args.tickets, args.files, args.seed):
+        print(path)
@@ -1,9 +1,14 @@
 import os
-import datetime
+from collections import Counter
+from itertools import islice
 import pandas as pd
-import xml.etree.ElementTree as ET
-from trend_categories import TREND_KEYWORDS
-from ticket_tagging_rules import TICKET_TYPE_RULES, ISSUE_TYPE_RULES
+from parser import iter_tickets, field, ticket_metadata
+from keyword_matcher import KeywordMatcher
+from rule_engine import RULES
+from near_duplicates import near_duplicate_groups
+from summarizer import SummaryCache, summarize_many, UNFINISHED_SUMMARIES
+from manifest import TicketManifest, ticket_hash
+from instrumentation import METRICS
 import openai
 
 # Load OpenAI key (injected by Streamlit Cloud)
@@ -13,133 +18,173 @@ def score_keywords(text, keywords):
     text_lower = text.lower()
     return sum(1 for word in keywords if word.lower() in text_lower)
 
+# Tagging and trend rules live in tagging_rules.json. RULES.matchers() returns them compiled
+# (one single-pass matcher per rule set) and recompiles after the file changes.
+
 def classify_tag(text, rules):
-    text = text.lower()
-    best_match = None
-    best_score = 0
-    for tag, keywords in rules.items():
-        score = score_keywords(text, keywords)
-        if score > best_score and score >= 1:
-            best_match = tag
-            best_score = score
+    # `rules` is a rule set name ("ticket_type", "issue_type", "trend"), a matcher or a keyword dict
+    with METRICS.stage("tag"):
+        if isinstance(rules, str):
+            matcher = RULES.matchers()[rules]
+        else:
+            matcher = rules if isinstance(rules, KeywordMatcher) else KeywordMatcher(rules)
+        best_match = matcher.best(text)
     return best_match if best_match else "Unknown"
 
-def summarize_text_gpt(content, instruction):
-    if not content or len(content.strip()) < 10:
-        return "Not enough content"
+def tag_tickets(tickets, text_col="combined_text", notes_col="agent_text"):
+    # Batch counterpart of classify_tag and the trend loop: tags every row of a
+    # DataFrame (or pyarrow Table), such as the one analyze_tickets returns, with the
+    # same scores and tie-breaking. Issue types are matched on the agent notes, so both
+    # columns are required.
+    if hasattr(tickets, "to_pandas"):
+        tickets = tickets.to_pandas()
+    missing = [col for col in (text_col, notes_col) if col not in tickets.columns]
+    if missing:
+        raise ValueError(f"tag_tickets needs the columns {missing}, got {list(tickets.columns)}")
+    matchers = RULES.matchers()
+    df = tickets.copy()
+    texts = df[text_col].fillna("").astype(str).tolist()
+    notes = df[notes_col].fillna("").astype(str).tolist()
+    with METRICS.stage("tag"):
+        df["Ticket Type (Auto Tagged)"] = [
+            tag or "Unknown" for tag in matchers["ticket_type"].best_many(texts)
+        ]
+        df["Issue Type (Auto Tagged)"] = [
+            tag or "Unknown" for tag in matchers["issue_type"].best_many(notes)
+        ]
+    with METRICS.stage("trend"):
+        # Object dtype keeps unmatched rows as None rather than NaN
+        df["Trend Category"] = pd.Series(matchers["trend"].best_many(texts), index=df.index, dtype=object)
+    return df
+
+def summarize_text_gpt(content, instruction, client=None, cache=None):
+    return summarize_many([(content, instruction)], client=client, cache=cache)[0]
+
+PROBLEM_INSTRUCTION = "Summarize the user's problem in 1-2 lines."
+RESOLUTION_INSTRUCTION = "Summarize the agent's resolution in 1-2 lines."
+
+# Tickets tagged, deduplicated and summarized together; bounds the working set of one file
+CHUNK_TICKETS = int(os.getenv("TICKET_ANALYZER_CHUNK_TICKETS", "2000"))
+
+def _new_tickets(source, manifest, result):
+    # One entry per new or changed ticket in `source`; tags and summaries are filled in
+    # per chunk by _enrich_chunk. A read error ends the file and is recorded in `result`.
     try:
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": instruction},
-                {"role": "user", "content": content}
-            ],
-            max_tokens=100,
-            temperature=0.3
-        )
-        return response.choices[0].message.content.strip()
+        for record in iter_tickets(source):
+            tid = field(record, "display_id", "N/A")
+            content_hash = ticket_hash(record)
+            ticket_key = tid if record["display_id"] is not None else content_hash
+            if manifest is not None and manifest.ticket_hash(ticket_key) == content_hash:
+                continue
+
+            subject = field(record, "subject", "")
+            description = field(record, "description", "")
+            metadata = ticket_metadata(record, debug=False)
+
+            yield {
+                "key": ticket_key,
+                "hash": content_hash,
+                "updated_at": record["updated_at"],
+                "category": None,
+                # The metadata's combined text, unless the subject is missing ("N/A" there)
+                "text": metadata["combined_text"] if record["subject"] is not None else description,
+                "metadata": metadata,
+                "categorized": None,
+                # Final enriched row; tags and summaries are filled in per chunk
+                "enriched": {
+                    "Ticket ID": tid,
+                    "Subject": subject,
+                    "Summary of Problem Statement": None,
+                    "Created": field(record, "created_at", "N/A"),
+                    "Current Ticket Type": field(record, "ticket_type", "N/A"),
+                    "Ticket Type (Auto Tagged)": None,
+                    "Priority (Auto Tagged)": field(record, "priority", "N/A"),
+                    "Current Issue Type": field(record, "issue_type", "N/A"),
+                    "Issue Type (Auto Tagged)": None,
+                    "Summary of Resolution (by agent)": None
+                },
+            }
     except Exception as e:
-        print(f"❌ GPT summarization failed: {e}")
-        return "Could not summarize"
-
-def generate_insights(folder_path):
-    today = datetime.datetime.now().strftime("%Y%m%d")
-    enriched_csv_file = f"ticket_analysis_output_{today}.csv"
-    categorized_map_file = f"categorized_ticket_map_{today}.csv"
-    insights_file = f"insights_report_{today}.txt"
-    unmatched_file = f"unmatched_samples_{today}.txt"
-
-    trend_map = {}
-    unmatched = []
-    enriched_rows = []
-    categorized_rows = []
-
-    for file in os.listdir(folder_path):
-        if file.endswith(".xml"):
-            try:
-                tree = ET.parse(os.path.join(folder_path, file))
-                root = tree.getroot()
-                for ticket in root.findall(".//helpdesk-ticket"):
-                    tid = ticket.findtext("display-id", default="N/A").strip()
-                    created = ticket.findtext("created-at", default="N/A").strip()
-                    priority = ticket.findtext("priority", default="N/A").strip()
-                    subject = ticket.findtext("subject", default="").strip()
-                    description = ticket.findtext("description", default="").strip()
-                    current_type = ticket.findtext("ticket-type", default="N/A").strip()
-                    current_issue = ticket.findtext("issue-type", default="N/A").strip()
-
-                    # Agent replies
-                    agent_text = " ".join([
-                        note.findtext("body", default="").strip()
-                        for note in ticket.findall(".//helpdesk-note")
-                        if note.findtext("body", default="").strip()
-                    ])
-
-                    combined_text = f"{subject} {description}".strip()
-
-                    # Summarize using GPT
-                    summary_problem = summarize_text_gpt(combined_text, "Summarize the user's problem in 1-2 lines.")
-                    summary_resolution = summarize_text_gpt(agent_text, "Summarize the agent's resolution in 1-2 lines.")
-
-                    # Auto-tagging
-                    ticket_type_tagged = classify_tag(combined_text, TICKET_TYPE_RULES)
-                    issue_type_tagged = classify_tag(agent_text, ISSUE_TYPE_RULES)
-
-                    # Trend detection
-                    best_match = None
-                    best_score = 0
-                    for category, keywords in TREND_KEYWORDS.items():
-                        score = score_keywords(combined_text.lower(), keywords)
-                        if score >= 3 and score > best_score:
-                            best_match = category
-                            best_score = score
-
-                    if best_match:
-                        trend_map.setdefault(best_match, []).append(combined_text)
-                        categorized_rows.append({
-                            "Category": best_match,
-                            "Ticket ID": tid,
-                            "Subject": subject,
-                            "Created At": created,
-                            "Priority": priority,
-                            "Type": best_match
-                        })
-                    else:
-                        unmatched.append(combined_text)
-
-                    # Final enriched row
-                    enriched_rows.append({
-                        "Ticket ID": tid,
-                        "Subject": subject,
-                        "Summary of Problem Statement": summary_problem,
-                        "Created": created,
-                        "Current Ticket Type": current_type,
-                        "Ticket Type (Auto Tagged)": ticket_type_tagged,
-                        "Priority (Auto Tagged)": priority,
-                        "Current Issue Type": current_issue,
-                        "Issue Type (Auto Tagged)": issue_type_tagged,
-                        "Summary of Resolution (by agent)": summary_resolution
-                    })
-
-            except Exception as e:
-                print(f"Error processing file {file}: {e}")
-
-    # Save files
-    if enriched_rows:
-        pd.DataFrame(enriched_rows).to_csv(enriched_csv_file, index=False)
-
-    if categorized_rows:
-        pd.DataFrame(categorized_rows).to_csv(categorized_map_file, index=False)
-
-    if unmatched:
-        with open(unmatched_file, "w") as f:
-            f.write("Unmatched Samples\n" + "=" * 20 + "\n\n")
-            for line in unmatched:
-                f.write(f"{line}\n\n")
-
-    with open(insights_file, "w") as f:
-        f.write("Customer Support Trends Report\n")
-        f.write("=" * 40 + "\n")
-        f.write(f"Generated on: {today}\n\n")
-        for category, samples in sorted(trend_map.items(), key=lambda x: len(x[1]), reverse=True):
-            f.write(f"🔹 {category} ({len(samples)} occurrences)\n\n")
+        # Keep the rows read before the failure, like the serial loop always did
+        result["error"] = f"{type(e).__name__}: {e}"
+
+def _enrich_chunk(tickets, client, cache, dedup, llm):
+    agent_texts = [ticket["metadata"]["agent_text"] for ticket in tickets]
+    group_of = list(range(len(tickets)))
+    if dedup:
+        with METRICS.stage("dedup"):
+            group_of = near_duplicate_groups(
+                [f"{ticket['text']} {agent_text}" for ticket, agent_text in zip(tickets, agent_texts)]
+            )
+    representatives = sorted(set(group_of))
+    position = {ticket_index: i for i, ticket_index in enumerate(representatives)}
+    group_sizes = Counter(group_of)
+    METRICS.count("near_duplicates", len(tickets) - len(representatives))
+
+    combined_texts = [tickets[i]["text"] for i in representatives]
+    agent_texts = [agent_texts[i] for i in representatives]
+
+    # Auto-tagging and trend detection for the whole chunk at once, with the current rules
+    tagged = tag_tickets(pd.DataFrame({"combined_text": combined_texts, "agent_text": agent_texts}))
+    ticket_types = tagged["Ticket Type (Auto Tagged)"].tolist()
+    issue_types = tagged["Issue Type (Auto Tagged)"].tolist()
+    trends = tagged["Trend Category"].tolist()
+    METRICS.count("tickets_enriched", len(representatives))
+
+    # Cached summaries are reused; only unseen texts go to GPT, in parallel
+    summary_requests = []
+    for combined_text, agent_text in zip(combined_texts, agent_texts):
+        summary_requests.append((combined_text, PROBLEM_INSTRUCTION))
+        summary_requests.append((agent_text, RESOLUTION_INSTRUCTION))
+    summaries = summarize_many(summary_requests, client=client, cache=cache, llm=llm)
+
+    for ticket_index, ticket in enumerate(tickets):
+        i = position[group_of[ticket_index]]
+        row = ticket["enriched"]
+        row["Summary of Problem Statement"] = summaries[2 * i]
+        row["Ticket Type (Auto Tagged)"] = ticket_types[i] or "Unknown"
+        row["Issue Type (Auto Tagged)"] = issue_types[i] or "Unknown"
+        row["Summary of Resolution (by agent)"] = summaries[2 * i + 1]
+        ticket["summarized"] = not (
+            summaries[2 * i] in UNFINISHED_SUMMARIES or summaries[2 * i + 1] in UNFINISHED_SUMMARIES
+        )
+
+        best_match = trends[i]
+        if best_match:
+            ticket["category"] = best_match
+            ticket["categorized"] = {
+                "Category": best_match,
+                "Ticket ID": row["Ticket ID"],
+                "Subject": row["Subject"],
+                "Created At": row["Created"],
+                "Priority": row["Priority (Auto Tagged)"],
+                "Type": best_match
+            }
+            if dedup:
+                ticket["categorized"]["Duplicate Group Size"] = group_sizes[group_of[ticket_index]]
+
+def analyze_ticket_file(source, client=None, manifest_path=None, dedup=False, llm=True, chunk_size=CHUNK_TICKETS):
+    # Read and enrich stages for one file: one entry per ticket carrying its metadata row,
+    # enriched row and trend category. Tickets are read, tagged and summarized chunk_size
+    # at a time, so only the finished entries grow with the file. With a manifest, tickets
+    # whose content hash is unchanged are skipped. With dedup, near-duplicate tickets in a
+    # chunk (alert storms) are enriched once through their first member and share its
+    # tags and summaries. With llm=False only already-cached summaries are used. Tickets
+    # left without a summary are flagged `summarized: False` and counted in "unfinished".
+    result = {"tickets": [], "error": None, "unfinished": 0}
+    manifest = TicketManifest(manifest_path) if manifest_path else None
+    cache = SummaryCache()
+    try:
+        tickets = _new_tickets(source, manifest, result)
+        while True:
+            chunk = list(islice(tickets, chunk_size))
+            if not chunk:
+                break
+            _enrich_chunk(chunk, client, cache, dedup, llm)
+            result["unfinished"] += sum(not ticket["summarized"] for ticket in chunk)
+            result["tickets"].extend(chunk)
+    finally:
+        cache.close()
+        if manifest is not None:
+            manifest.close()
+    return result
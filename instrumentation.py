@@ -0,0 +1,169 @@
+# instrumentation.py
+
+import contextlib
+import contextvars
+import cProfile
+import json
+import threading
+import time
+import tracemalloc
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class Metrics:
+    """Stage timings, counters and latency samples for one pipeline run."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self.stages = {}
+            self.counters = {}
+            self.latencies = {}
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name, seconds, calls=1):
+        with self._lock:
+            total, count = self.stages.get(name, (0.0, 0))
+            self.stages[name] = (total + seconds, count + calls)
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def observe(self, name, seconds):
+        with self._lock:
+            self.latencies.setdefault(name, []).append(seconds)
+
+    def raw(self):
+        with self._lock:
+            return {
+                "stages": dict(self.stages),
+                "counters": dict(self.counters),
+                "latencies": {name: list(values) for name, values in self.latencies.items()},
+            }
+
+    def merge(self, raw):
+        # Folds in metrics recorded by a worker process
+        for name, (seconds, calls) in raw["stages"].items():
+            self.add_time(name, seconds, calls)
+        for name, n in raw["counters"].items():
+            self.count(name, n)
+        with self._lock:
+            for name, values in raw["latencies"].items():
+                self.latencies.setdefault(name, []).extend(values)
+
+    def summary(self):
+        raw = self.raw()
+        wall = time.time() - self.started
+        tickets = raw["counters"].get("tickets", 0)
+        latencies = {}
+        for name, values in raw["latencies"].items():
+            values = sorted(values)
+            latencies[name] = {
+                "count": len(values),
+                "p50_ms": round(_percentile(values, 50) * 1000, 2),
+                "p90_ms": round(_percentile(values, 90) * 1000, 2),
+                "p99_ms": round(_percentile(values, 99) * 1000, 2),
+                "max_ms": round(values[-1] * 1000, 2),
+            }
+        stages = {}
+        for name, (seconds, calls) in raw["stages"].items():
+            stages[name] = {
+                "seconds": round(seconds, 4),
+                "calls": calls,
+                "tickets_per_second": round(tickets / seconds, 1) if tickets and seconds else None,
+            }
+        return {
+            "wall_seconds": round(wall, 3),
+            "tickets_per_second": round(tickets / wall, 1) if tickets and wall else None,
+            "stages": stages,
+            "counters": raw["counters"],
+            "latencies": latencies,
+        }
+
+
+# The Metrics of the run in progress in this thread (or async task), if any
+_current = contextvars.ContextVar("metrics", default=None)
+
+
+class _CurrentMetrics:
+    """Forwards to the current run's Metrics (see use_metrics), else to a process-wide one.
+
+    Concurrent runs in one process, such as two Streamlit sessions, each record into
+    their own Metrics instead of sharing (and resetting) one set of counters.
+    """
+
+    def __init__(self, default):
+        self._default = default
+
+    def __getattr__(self, name):
+        return getattr(_current.get() or self._default, name)
+
+
+METRICS = _CurrentMetrics(Metrics())
+
+
+@contextlib.contextmanager
+def use_metrics(metrics):
+    # Threads started inside only see `metrics` if they run in a copy of this context
+    # (contextvars.copy_context().run)
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
+
+
+def write_run_summary(path, metrics=METRICS):
+    summary = metrics.summary()
+    with open(path, "w") as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
+
+@contextlib.contextmanager
+def profiling(mode, output_prefix):
+    # mode is "cprofile" (writes <prefix>.pstats), "tracemalloc" (writes <prefix>_memory.txt) or None
+    if mode == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(f"{output_prefix}.pstats")
+            print(f"📈 cProfile stats saved to {output_prefix}.pstats")
+    elif mode == "tracemalloc":
+        tracemalloc.start(25)
+        try:
+            yield
+        finally:
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            with open(f"{output_prefix}_memory.txt", "w") as f:
+                f.write(f"Peak traced memory: {peak / 1024 / 1024:.1f} MB\n\nTop allocations:\n")
+                for stat in snapshot.statistics("lineno")[:30]:
+                    f.write(f"{stat}\n")
+            print(f"📈 tracemalloc report saved to {output_prefix}_memory.txt")
+    elif mode:
+        raise ValueError(f"Unknown profiling mode {mode!r}, expected 'cprofile' or 'tracemalloc'")
+    else:
+        yield
@@ -0,0 +1,122 @@
+# keyword_matcher.py
+
+import re
+import numpy as np
+from scipy import sparse
+
+
+def _trie_pattern(keywords):
+    # Nest the keywords into a trie so the regex engine walks shared prefixes once
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for ch in keyword:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node):
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # Optional groups are greedy, so the longest keyword at a position is found first
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """Scores every category of a rule set in one pass over the text.
+
+    A category's score is the number of its keywords that occur anywhere in the
+    lowercased text, exactly as `score_keywords` counts them. `weights` optionally
+    gives a keyword a different weight within a category ({category: {keyword: weight}}),
+    and `thresholds` the minimum score a category needs to win ({category: threshold}).
+    """
+
+    def __init__(self, rules, weights=None, thresholds=None):
+        weights = weights or {}
+        thresholds = thresholds or {}
+        self.categories = list(rules)
+        self.thresholds = [thresholds.get(category, 1) for category in self.categories]
+        self._always = [0] * len(self.categories)
+        self._weights = {}
+        for idx, (category, keywords) in enumerate(rules.items()):
+            category_weights = {word.lower(): w for word, w in weights.get(category, {}).items()}
+            for word in keywords:
+                word = word.lower()
+                weight = category_weights.get(word, 1)
+                if not word:
+                    self._always[idx] += weight
+                    continue
+                self._weights.setdefault(word, []).append((idx, weight))
+
+        words = sorted(self._weights)
+        self._words = words
+        self._columns = {word: col for col, word in enumerate(words)}
+        self._weight_matrix = np.zeros((len(words), len(self.categories)), dtype=np.float64)
+        for row, word in enumerate(words):
+            for idx, weight in self._weights[word]:
+                self._weight_matrix[row, idx] += weight
+        self._pattern = re.compile(f"(?=({_trie_pattern(words)}))") if words else None
+        # Every keyword that is a prefix of the longest match at a position also matches there
+        self._implied = {word: [w for w in words if word.startswith(w)] for word in words}
+
+    def keywords_in(self, text):
+        found = set()
+        if self._pattern is None:
+            return found
+        for longest in set(self._pattern.findall(text.lower())):
+            found.update(self._implied[longest])
+        return found
+
+    def scores(self, text):
+        scores = list(self._always)
+        for word in self.keywords_in(text):
+            for idx, weight in self._weights[word]:
+                scores[idx] += weight
+        return scores
+
+    def _thresholds(self, threshold):
+        # An explicit threshold applies to every category, overriding the per-rule ones
+        return self.thresholds if threshold is None else [threshold] * len(self.categories)
+
+    def best(self, text, threshold=None):
+        # Ties go to the category listed first, like the original dict loops
+        best_match = None
+        best_score = 0
+        for category, score, minimum in zip(self.categories, self.scores(text), self._thresholds(threshold)):
+            if score >= minimum and score > best_score:
+                best_match = category
+                best_score = score
+        return best_match
+
+    def presence_matrix(self, texts):
+        """Sparse (n_texts x n_keywords) matrix with a 1 where the keyword occurs in the text."""
+        indptr = [0]
+        indices = []
+        for text in texts:
+            indices.extend(self._columns[word] for word in self.keywords_in(text))
+            indptr.append(len(indices))
+        data = np.ones(len(indices), dtype=np.int32)
+        return sparse.csr_matrix((data, indices, indptr), shape=(len(indptr) - 1, len(self._words)))
+
+    def score_matrix(self, texts):
+        """Scores for many texts at once, as an (n_texts x n_categories) array."""
+        scores = self.presence_matrix(texts) @ self._weight_matrix
+        return np.asarray(scores) + np.array(self._always, dtype=np.float64)
+
+    def best_many(self, texts, threshold=None):
+        # Categories below their threshold are ruled out first; argmax then picks the
+        # first category on ties, matching best()
+        scores = self.score_matrix(texts)
+        if not self.categories:
+            return [None] * len(scores)
+        eligible = np.where(scores >= np.array(self._thresholds(threshold)), scores, 0)
+        winners = eligible.argmax(axis=1)
+        top = eligible[np.arange(len(eligible)), winners]
+        categories = self.categories
+        return [
+            categories[winner] if score > 0 else None
+            for winner, score in zip(winners.tolist(), top.tolist())
+        ]
@@ -1,39 +1,169 @@
+import argparse
 import os
-import pandas as pd
+import signal
+import time
 from datetime import datetime
-from parser import parse_all_xmls
-from analyzer import analyze_tickets
-from conversation_analyzer import generate_insights
+from analyzer import OUTPUT_FORMATS, analyze_tickets, analyze_tags
+from parser import resolve_sources
+from pipeline import run_pipeline
+from manifest import MANIFEST_PATH
+from ticket_store import STORE_PATH
+from trend_clusters import CLUSTER_MODEL_PATH
+from instrumentation import Metrics, profiling, use_metrics, write_run_summary
+from watcher import FolderWatcher, POLL_SECONDS, QUEUE_SIZE, BATCH_FILES, REBUILD_MINUTES, RETRY_SECONDS
 
-def job():
-    folder_path = "/Users/kaushik.iyer/Documents/ticket_analyzer/xml_files"  # Your folder path
+# Folder of .xml exports, or a glob such as "exports/**/*.xml"
+INPUT_PATH = os.getenv("TICKET_ANALYZER_INPUT", "xml_files")
+# Number of XML files parsed in parallel (1 = serial)
+WORKERS = int(os.getenv("TICKET_ANALYZER_WORKERS", "1"))
+# csv, parquet (partitioned by created month) or both
+OUTPUT_FORMAT = os.getenv("TICKET_ANALYZER_OUTPUT_FORMAT", "csv")
+# Request GPT summaries; when off, only already-cached summaries are used
+LLM = os.getenv("TICKET_ANALYZER_LLM", "1") == "1"
+# Enrich near-duplicate tickets (e.g. alert storms) once per group
+DEDUP = os.getenv("TICKET_ANALYZER_DEDUP", "0") == "1"
+# Optional profiler around the whole job: cprofile or tracemalloc
+PROFILE_MODE = os.getenv("TICKET_ANALYZER_PROFILE")
 
-    tickets = parse_all_xmls(folder_path)
-    if not tickets:
-        print("No tickets found.")
+def job(input_path=INPUT_PATH, output_dir=".", output_format=OUTPUT_FORMAT, workers=WORKERS, llm=LLM, dedup=DEDUP,
+        write_outputs=True):
+    sources = resolve_sources(input_path)
+    if not sources:
+        print(f"No XML files found for {input_path}")
         return
 
-    df = analyze_tickets(tickets)
-    
-    today = datetime.today().strftime('%Y%m%d')
-    output_csv = f"ticket_analysis_output_{today}.csv"
-    df.to_csv(output_csv, index=False)
+    # One pass writes the metadata, enriched, categorized and insights outputs.
+    # With the manifest only new or changed tickets are re-enriched; outputs still cover all history.
+    result = run_pipeline(sources, output_dir=output_dir, workers=workers, manifest_path=MANIFEST_PATH,
+                          output_format=output_format, store_path=STORE_PATH,
+                          cluster_model_path=CLUSTER_MODEL_PATH, dedup=dedup, llm=llm,
+                          write_outputs=write_outputs)
+    if result["tickets"].empty:
+        print("No tickets found.")
+        return result
+
+    # The same tickets the reports cover: all history, or just this batch when not writing
+    analyze_tickets(result["tickets"])
+    analyze_tags(result["enriched"])
+    for name, paths in result["outputs"].items():
+        print(f"✅ {name.capitalize()} output saved to {', '.join(paths)}")
+    return result
+
+def rebuild(output_dir=".", output_format=OUTPUT_FORMAT):
+    # Full-history artifacts straight from the manifest, without reading any export
+    result = run_pipeline([], output_dir=output_dir, manifest_path=MANIFEST_PATH, output_format=output_format,
+                          store_path=STORE_PATH, cluster_model_path=CLUSTER_MODEL_PATH)
+    for name, paths in result["outputs"].items():
+        print(f"✅ {name.capitalize()} output saved to {', '.join(paths)}")
 
-    print(f"✅ Ticket data saved to {output_csv}")
+def run(profile=PROFILE_MODE, run_name=None, **options):
+    # Outputs are dated; the run summary and profile are named after run_name (default: the date)
+    run_name = run_name or datetime.today().strftime('%Y%m%d')
+    output_dir = options.get("output_dir", ".")
+    os.makedirs(output_dir, exist_ok=True)
+    metrics = Metrics()
+    with use_metrics(metrics), profiling(profile, os.path.join(output_dir, f"profile_{run_name}")):
+        result = job(**options)
+    summary_file = os.path.join(output_dir, f"run_summary_{run_name}.json")
+    summary = write_run_summary(summary_file, metrics)
+    print(f"⏱️ Run summary saved to {summary_file} ({summary['wall_seconds']}s)")
+    return result
 
-    insights = generate_insights(folder_path)
-    output_txt = f"insights_report_{today}.txt"
+def watch(input_path=INPUT_PATH, interval=POLL_SECONDS, queue_size=QUEUE_SIZE, batch_size=BATCH_FILES,
+          rebuild_minutes=REBUILD_MINUTES, retry_seconds=RETRY_SECONDS, **options):
+    # Long-running ingestion: each batch of new or changed files is one incremental run that
+    # only updates the manifest and store, with its own run summary. Files that failed or
+    # were left with unsummarized tickets are queued again after retry_seconds (doubling per
+    # retry). The full-history artifacts are rebuilt every rebuild_minutes (if anything
+    # arrived) and on exit.
+    watcher = FolderWatcher(input_path, interval=interval, queue_size=queue_size, retry_seconds=retry_seconds)
+    # Service managers stop with SIGTERM; finish the current batch and exit like Ctrl+C
+    signal.signal(signal.SIGTERM, lambda signum, frame: watcher.stopped.set())
+    watcher.start()
+    print(f"👀 Watching {input_path} every {interval:g}s (Ctrl+C to stop)")
+    batches = 0
+    stale = False
+    last_rebuild = time.monotonic()
+    try:
+        for batch in watcher.batches(batch_size, idle=1):
+            if batch:
+                batches += 1
+                print(f"\n📥 {len(batch)} new, changed or retried file(s), {watcher.queue.qsize()} still queued")
+                try:
+                    result = run(input_path=batch, write_outputs=False,
+                                 run_name=f"{datetime.now():%Y%m%d_%H%M%S}_batch{batches}", **options)
+                    stale = True
+                    retry = set()
+                    if result:
+                        retry = {path for path, _ in result["failures"]} | set(result["unfinished"])
+                except Exception as e:
+                    # One bad batch shouldn't stop the watcher; all of its files are retried
+                    print(f"❌ Batch failed: {type(e).__name__}: {e}")
+                    retry = set(batch)
+                if retry:
+                    delays = watcher.retry(path for path in batch if path in retry)
+                    print(f"🔁 Retrying {len(delays)} failed or unfinished file(s) in {min(delays.values()):g}s")
+            if stale and rebuild_minutes and time.monotonic() - last_rebuild >= rebuild_minutes * 60:
+                rebuild(options["output_dir"], options["output_format"])
+                stale = False
+                last_rebuild = time.monotonic()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print("\n🛑 Stopping watcher")
+        watcher.stop()
+        if stale:
+            rebuild(options["output_dir"], options["output_format"])
 
-    with open(output_txt, "w") as f:
-        f.write("Customer Support Trends Report\n")
-        f.write("="*60 + "\n\n")
-        f.write(f"Generated on: {today}\n\n")
-        f.write("Top Problem Patterns:\n")
-        f.write("-"*30 + "\n")
-        for phrase, count in insights:
-            f.write(f"- {phrase} ({count} occurrences)\n")
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze Freshdesk XML ticket exports.")
+    parser.add_argument("input", nargs="?", default=INPUT_PATH,
+                        help=f"folder of .xml exports or a glob such as 'exports/**/*.xml' (default: {INPUT_PATH})")
+    parser.add_argument("-o", "--output-dir", default=".", help="where reports are written (default: current folder)")
+    parser.add_argument("-f", "--format", dest="output_format", choices=OUTPUT_FORMATS, default=OUTPUT_FORMAT,
+                        help=f"output format (default: {OUTPUT_FORMAT})")
+    parser.add_argument("-w", "--workers", type=int, default=WORKERS, help=f"files parsed in parallel (default: {WORKERS})")
+    parser.add_argument("--llm", action=argparse.BooleanOptionalAction, default=LLM,
+                        help="request GPT summaries; --no-llm uses cached summaries only")
+    parser.add_argument("--dedup", action=argparse.BooleanOptionalAction, default=DEDUP,
+                        help="enrich near-duplicate tickets once per group")
+    parser.add_argument("--profile", choices=["cprofile", "tracemalloc"], default=PROFILE_MODE,
+                        help="profile the run and save the report next to the outputs")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="only rewrite the full-history reports from the manifest, reading no exports")
+    watching = parser.add_argument_group("watch mode")
+    watching.add_argument("--watch", action="store_true", help="keep running and process new files as they appear")
+    watching.add_argument("--interval", type=float, default=POLL_SECONDS,
+                          help=f"seconds between folder scans (default: {POLL_SECONDS:g})")
+    watching.add_argument("--queue-size", type=int, default=QUEUE_SIZE,
+                          help=f"files queued before scanning pauses (default: {QUEUE_SIZE})")
+    watching.add_argument("--batch-size", type=int, default=BATCH_FILES,
+                          help=f"files processed per run (default: {BATCH_FILES})")
+    watching.add_argument("--rebuild-every", dest="rebuild_minutes", type=float, default=REBUILD_MINUTES,
+                          help=f"minutes between rebuilds of the full-history reports, 0 = only on exit "
+                               f"(default: {REBUILD_MINUTES:g})")
+    watching.add_argument("--retry-after", dest="retry_seconds", type=float, default=RETRY_SECONDS,
+                          help=f"seconds before a failed or unfinished file is retried, doubling per retry "
+                               f"(default: {RETRY_SECONDS:g})")
+    return parser.parse_args(argv)
 
-    print(f"✅ Insights report saved to {output_txt}")
+def main(argv=None):
+    args = parse_args(argv)
+    options = {
+        "output_dir": args.output_dir,
+        "output_format": args.output_format,
+        "workers": args.workers,
+        "llm": args.llm,
+        "dedup": args.dedup,
+        "profile": args.profile,
+    }
+    if args.rebuild:
+        rebuild(args.output_dir, args.output_format)
+    elif args.watch:
+        watch(args.input, interval=args.interval, queue_size=args.queue_size, batch_size=args.batch_size,
+              rebuild_minutes=args.rebuild_minutes, retry_seconds=args.retry_seconds, **options)
+    else:
+        run(input_path=args.input, **options)
 
 if __name__ == "__main__":
-    job()
+    main()
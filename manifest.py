@@ -0,0 +1,127 @@
+# manifest.py
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+MANIFEST_PATH = os.getenv("TICKET_ANALYZER_MANIFEST", "ticket_manifest.db")
+
+
+def file_checksum(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def ticket_hash(record):
+    # The raw record includes updated-at and the note bodies, so any edit changes the hash
+    return hashlib.sha256(json.dumps(record, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class TicketManifest:
+    """Processed export files and the enriched result of every ticket seen so far."""
+
+    def __init__(self, path=MANIFEST_PATH):
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS files (
+                checksum TEXT PRIMARY KEY, path TEXT, processed_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS tickets (
+                ticket_key TEXT PRIMARY KEY, content_hash TEXT, updated_at TEXT,
+                category TEXT, text TEXT, enriched TEXT, categorized TEXT, metadata TEXT
+            );
+            CREATE TABLE IF NOT EXISTS settings (
+                name TEXT PRIMARY KEY, value TEXT
+            );
+            """
+        )
+        # Manifests written before the metadata column existed
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(tickets)")}
+        if "metadata" not in columns:
+            self.conn.execute("ALTER TABLE tickets ADD COLUMN metadata TEXT")
+        self.conn.commit()
+
+    def reset_if_rules_changed(self, rules_version):
+        # Tags depend on the rules, so after a rules edit every file and ticket counts as
+        # unprocessed again (their summaries still come from the cache). Returns True on a reset.
+        row = self.conn.execute("SELECT value FROM settings WHERE name = 'rules_version'").fetchone()
+        changed = row is not None and row[0] != rules_version
+        if changed:
+            self.conn.execute("DELETE FROM files")
+            self.conn.execute("UPDATE tickets SET content_hash = NULL")
+        self.conn.execute(
+            "INSERT OR REPLACE INTO settings (name, value) VALUES ('rules_version', ?)", (rules_version,)
+        )
+        self.conn.commit()
+        return changed
+
+    def has_file(self, checksum):
+        row = self.conn.execute("SELECT 1 FROM files WHERE checksum = ?", (checksum,)).fetchone()
+        return row is not None
+
+    def mark_files(self, files):
+        now = time.time()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO files (checksum, path, processed_at) VALUES (?, ?, ?)",
+            [(checksum, path, now) for path, checksum in files],
+        )
+        self.conn.commit()
+
+    def ticket_hash(self, ticket_key):
+        row = self.conn.execute(
+            "SELECT content_hash FROM tickets WHERE ticket_key = ?", (ticket_key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def upsert_tickets(self, entries):
+        # ON CONFLICT keeps the original rowid, so a ticket stays where it was first seen.
+        # Tickets still missing a summary are stored without a content hash, so the next
+        # run enriches them again.
+        self.conn.executemany(
+            """
+            INSERT INTO tickets (ticket_key, content_hash, updated_at, category, text, enriched, categorized, metadata)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(ticket_key) DO UPDATE SET
+                content_hash = excluded.content_hash, updated_at = excluded.updated_at,
+                category = excluded.category, text = excluded.text,
+                enriched = excluded.enriched, categorized = excluded.categorized,
+                metadata = excluded.metadata
+            """,
+            [
+                (
+                    entry["key"], entry["hash"] if entry.get("summarized", True) else None,
+                    entry["updated_at"], entry["category"], entry["text"],
+                    json.dumps(entry["enriched"]),
+                    json.dumps(entry["categorized"]) if entry["categorized"] is not None else None,
+                    json.dumps(entry["metadata"]),
+                )
+                for entry in entries
+            ],
+        )
+        self.conn.commit()
+
+    def iter_entries(self):
+        rows = self.conn.execute(
+            "SELECT ticket_key, content_hash, updated_at, category, text, enriched, categorized, metadata"
+            " FROM tickets ORDER BY rowid"
+        )
+        for key, content_hash, updated_at, category, text, enriched, categorized, metadata in rows:
+            yield {
+                "key": key,
+                "hash": content_hash,
+                "updated_at": updated_at,
+                "category": category,
+                "text": text,
+                "enriched": json.loads(enriched),
+                "categorized": json.loads(categorized) if categorized is not None else None,
+                "metadata": json.loads(metadata) if metadata is not None else None,
+            }
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,135 @@
+# near_duplicates.py
+
+import re
+import zlib
+import numpy as np
+
+NUM_PERM = 64
+BANDS = 16
+# Estimated Jaccard similarity of word shingles needed to join a group
+SIMILARITY_THRESHOLD = 0.8
+SHINGLE_WORDS = 3
+# Only the start of an oversized ticket (e.g. a pasted log) is shingled
+MAX_DOC_TOKENS = 20000
+# Tokens hashed per chunk and permutations applied per slice; together they bound the
+# temporary (PERM_SLICE x chunk) products to a few MB
+CHUNK_TOKENS = 50000
+PERM_SLICE = 16
+
+_EMPTY = np.iinfo(np.uint64).max
+# Multiply-shift hash functions on 64-bit shingle values; all arithmetic wraps mod 2**64
+_rng = np.random.RandomState(1)
+_A = _rng.randint(1, 1 << 62, size=NUM_PERM, dtype=np.int64).astype(np.uint64) | np.uint64(1)
+_B = _rng.randint(0, 1 << 62, size=NUM_PERM, dtype=np.int64).astype(np.uint64)
+_MIX = _rng.randint(1, 1 << 62, size=SHINGLE_WORDS, dtype=np.int64).astype(np.uint64) | np.uint64(1)
+_SHIFT = np.uint64(32)
+
+# Ticket numbers, dates and message ids are what usually differ between copies of an alert
+_TOKEN_RE = re.compile(r"[a-z]+|\d+")
+
+
+def _token_hashes(texts):
+    # One crc32 per distinct token; digits all map to the same token
+    vocab = {}
+    docs = []
+    for text in texts:
+        ids = []
+        for match in _TOKEN_RE.finditer((text or "").lower()):
+            if len(ids) == MAX_DOC_TOKENS:
+                break
+            token = match.group()
+            if token.isdigit():
+                token = "#"
+            value = vocab.get(token)
+            if value is None:
+                value = vocab[token] = zlib.crc32(token.encode("utf-8"))
+            ids.append(value)
+        docs.append(ids)
+    return docs
+
+
+def minhash_signatures(texts, chunk_tokens=CHUNK_TOKENS):
+    """NUM_PERM-wide MinHash signature of each text's word shingles.
+
+    Texts without any words keep a signature of all max values.
+    """
+    docs = _token_hashes(texts)
+    signatures = np.full((len(texts), NUM_PERM), _EMPTY, dtype=np.uint64)
+    start = 0
+    while start < len(docs):
+        # A bounded number of tokens at a time keeps the permutation matrix small
+        end = start
+        total = 0
+        while end < len(docs) and (total == 0 or total + len(docs[end]) <= chunk_tokens):
+            total += len(docs[end])
+            end += 1
+        rows = [i for i in range(start, end) if docs[i]]
+        start = end
+        if not rows:
+            continue
+        lengths = np.array([len(docs[i]) for i in rows])
+        tokens = np.fromiter((value for i in rows for value in docs[i]), dtype=np.uint64, count=int(lengths.sum()))
+        doc_start = np.repeat(np.cumsum(lengths) - lengths, lengths)
+        position = np.arange(len(tokens)) - doc_start
+        doc_length = np.repeat(lengths, lengths)
+
+        # Shingle at each position that has SHINGLE_WORDS tokens left in its own document;
+        # documents shorter than that are a single shingle of all their tokens
+        shingle = np.zeros(len(tokens), dtype=np.uint64)
+        for k in range(SHINGLE_WORDS):
+            shifted = np.zeros(len(tokens), dtype=np.uint64)
+            shifted[:len(tokens) - k] = tokens[k:]
+            shifted[position + k >= doc_length] = 0
+            shingle = shingle * _MIX[k] + shifted
+        keep = (position + SHINGLE_WORDS <= doc_length) | ((position == 0) & (doc_length < SHINGLE_WORDS))
+        shingle_doc = np.repeat(np.arange(len(rows)), lengths)[keep]
+        shingle = shingle[keep]
+
+        offsets = np.flatnonzero(np.r_[True, shingle_doc[1:] != shingle_doc[:-1]])
+        for perm in range(0, NUM_PERM, PERM_SLICE):
+            a, b = _A[perm:perm + PERM_SLICE, None], _B[perm:perm + PERM_SLICE, None]
+            permuted = (a * shingle[None, :] + b) >> _SHIFT
+            signatures[rows, perm:perm + PERM_SLICE] = np.minimum.reduceat(permuted, offsets, axis=1).T
+    return signatures
+
+
+def near_duplicate_groups(texts, threshold=SIMILARITY_THRESHOLD):
+    """Index of each text's group representative (its first member in `texts`).
+
+    Candidates come from LSH banding of the signatures and are only merged when
+    their estimated Jaccard similarity reaches `threshold`.
+    """
+    signatures = minhash_signatures(texts)
+    candidates = np.flatnonzero(signatures[:, 0] != _EMPTY)
+    parent = np.arange(len(texts))
+    if len(candidates) < 2:
+        return parent.tolist()
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    rows = NUM_PERM // BANDS
+    for band in range(BANDS):
+        # Texts whose band rows all agree share a bucket; each member is checked against the
+        # bucket's first (lowest-index) text
+        band_key = np.zeros(len(candidates), dtype=np.uint64)
+        for row in signatures[candidates, band * rows:(band + 1) * rows].T:
+            band_key = band_key * np.uint64(0x9E3779B1) + row
+        order = np.argsort(band_key, kind="stable")
+        keys = band_key[order]
+        new_bucket = np.r_[True, keys[1:] != keys[:-1]]
+        heads = order[np.flatnonzero(new_bucket)[np.cumsum(new_bucket) - 1]]
+        pairs = heads != order
+        heads, others = candidates[heads[pairs]], candidates[order[pairs]]
+        if not len(heads):
+            continue
+        similar = (signatures[heads] == signatures[others]).mean(axis=1) >= threshold
+        for head, other in zip(heads[similar], others[similar]):
+            root_head, root_other = find(head), find(other)
+            if root_head != root_other:
+                # The lower index stays the root, so the representative is the first member
+                parent[max(root_head, root_other)] = min(root_head, root_other)
+    return [int(find(i)) for i in range(len(texts))]
@@ -1,46 +1,225 @@
+import glob
+import os
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from lxml import etree
+from instrumentation import METRICS, Metrics, use_metrics
+
+# Uncompressed size caps for XML members streamed out of an uploaded ZIP
+MAX_MEMBER_BYTES = int(os.getenv("TICKET_ANALYZER_MAX_XML_BYTES", str(512 * 1024 * 1024)))
+MAX_ARCHIVE_BYTES = int(os.getenv("TICKET_ANALYZER_MAX_ZIP_BYTES", str(2 * 1024 * 1024 * 1024)))
+
+TICKET_TAG = "helpdesk-ticket"
+NOTE_TAG = "helpdesk-note"
+
+# Fields copied verbatim from each <helpdesk-ticket>; None means the tag was missing
+TICKET_FIELDS = {
+    "display-id": "display_id",
+    "subject": "subject",
+    "created-at": "created_at",
+    "updated-at": "updated_at",
+    "priority": "priority",
+    "description": "description",
+    "type": "type",
+    "ticket-type": "ticket_type",
+    "issue-type": "issue_type",
+    "group-id": "group_id",
+}
+
+
+def field(record, name, default):
+    value = record.get(name)
+    return (default if value is None else value).strip()
+
+
+def _ticket_record(ticket):
+    record = {key: ticket.findtext(tag) for tag, key in TICKET_FIELDS.items()}
+
+    custom_field = ticket.find("custom_field")
+    record["cf_issue_type"] = None if custom_field is None else custom_field.findtext("cf_issue_type_430969")
+
+    # Agent replies
+    record["notes"] = [
+        note.findtext("body", default="").strip()
+        for note in ticket.iter(NOTE_TAG)
+        if note.findtext("body", default="").strip()
+    ]
+    return record
+
+
+def iter_tickets(source):
+    # Stream one ticket record at a time so memory stays flat regardless of export size.
+    # `source` may be a path or a binary file-like object.
+    # Only time spent inside the parser counts towards the "parse" stage, not the consumer's
+    start = time.perf_counter()
+    context = etree.iterparse(
+        source, events=("end",), tag=TICKET_TAG,
+        huge_tree=True, resolve_entities=False, no_network=True,
+    )
+    for _, ticket in context:
+        record = _ticket_record(ticket)
+        # Release the consumed ticket and any already-processed siblings
+        ticket.clear(keep_tail=True)
+        parent = ticket.getparent()
+        if parent is not None:
+            while ticket.getprevious() is not None:
+                del parent[0]
+        METRICS.add_time("parse", time.perf_counter() - start, calls=0)
+        METRICS.count("tickets_parsed")
+        yield record
+        start = time.perf_counter()
+    del context
+    METRICS.add_time("parse", time.perf_counter() - start)
+    METRICS.count("files_parsed")
+    if isinstance(source, (str, os.PathLike)):
+        METRICS.count("bytes_read", os.path.getsize(source))
+    elif hasattr(source, "tell"):
+        METRICS.count("bytes_read", source.tell())
+
+
+def ticket_metadata(record, debug=True):
+    t_data = {}
+    t_data["ticket_id"] = field(record, "display_id", "N/A")
+    t_data["subject"] = field(record, "subject", "N/A")
+    t_data["created_at"] = field(record, "created_at", "N/A")
+    t_data["priority"] = field(record, "priority", "N/A")
+    t_data["description"] = field(record, "description", "")
+
+    # Extract Ticket Type
+    ticket_type = record["type"]
+    if ticket_type:
+        t_data["type"] = ticket_type.strip()
+    else:
+        if debug:
+            print(f"[DEBUG] No <type> tag found for Ticket ID: {t_data['ticket_id']}")
+        t_data["type"] = "Unknown"
+
+    # Extract group ID
+    group_id = field(record, "group_id", "")
+    if not group_id:
+        group_id = "unassigned"
+    t_data["group_id"] = group_id
+
+    # Extract current issue type from <custom_field>
+    issue_type = "N/A"
+    raw_issue = record["cf_issue_type"]
+    if raw_issue and raw_issue.strip():
+        issue_type = raw_issue.strip()
+    t_data["current_issue_type"] = issue_type
+
+    # Combine text for downstream analysis
+    t_data["combined_text"] = f"{t_data['subject']} {t_data['description']}".strip()
+    # Agent replies, which issue types are tagged on
+    t_data["agent_text"] = " ".join(record["notes"])
+    return t_data
 
-import xml.etree.ElementTree as ET
 
 def parse_ticket_xml(file_path):
     tickets = []
     try:
-        tree = ET.parse(file_path)
-        root = tree.getroot()
-
-        for ticket in root.findall(".//helpdesk-ticket"):
-            t_data = {}
-            t_data["ticket_id"] = ticket.findtext("display-id", default="N/A").strip()
-            t_data["subject"] = ticket.findtext("subject", default="N/A").strip()
-            t_data["created_at"] = ticket.findtext("created-at", default="N/A").strip()
-            t_data["priority"] = ticket.findtext("priority", default="N/A").strip()
-            t_data["description"] = ticket.findtext("description", default="").strip()
-
-            # Extract Ticket Type
-            ticket_type = ticket.findtext("type")
-            if ticket_type:
-                t_data["type"] = ticket_type.strip()
-            else:
-                print(f"[DEBUG] No <type> tag found for Ticket ID: {t_data['ticket_id']}")
-                t_data["type"] = "Unknown"
-
-            # Extract group ID
-            group_id = ticket.findtext("group-id", default="").strip()
-            if not group_id:
-                group_id = "unassigned"
-            t_data["group_id"] = group_id
-
-            # Extract current issue type from <custom_field>
-            custom_field = ticket.find("custom_field")
-            issue_type = "N/A"
-            if custom_field is not None:
-                raw_issue = custom_field.findtext("cf_issue_type_430969")
-                if raw_issue and raw_issue.strip():
-                    issue_type = raw_issue.strip()
-            t_data["current_issue_type"] = issue_type
-
-            # Combine text for downstream analysis
-            t_data["combined_text"] = f"{t_data['subject']} {t_data['description']}".strip()
-            tickets.append(t_data)
+        for record in iter_tickets(file_path):
+            tickets.append(ticket_metadata(record))
     except Exception as e:
         print(f"❌ Failed to parse {file_path}: {e}")
     return tickets
+
+
+def _parse_file(file_path):
+    return [ticket_metadata(record) for record in iter_tickets(file_path)]
+
+
+def list_xml_files(folder_path):
+    return sorted(
+        os.path.join(folder_path, file)
+        for file in os.listdir(folder_path)
+        if file.endswith(".xml")
+    )
+
+
+def iter_zip_xmls(archive, skipped, max_member_bytes=MAX_MEMBER_BYTES, max_total_bytes=MAX_ARCHIVE_BYTES):
+    # Stream .xml members straight out of a ZIP (path or file-like) without extracting
+    # them to disk. zipfile never inflates a member past its declared size, so checking
+    # the declared sizes is enough to enforce both caps. Skipped members go to `skipped`.
+    total = 0
+    with zipfile.ZipFile(archive) as zf:
+        for info in zf.infolist():
+            if info.is_dir() or not info.filename.endswith(".xml") or info.filename.startswith("__MACOSX/"):
+                continue
+            if info.file_size > max_member_bytes:
+                skipped.append((info.filename, f"skipped, {info.file_size} bytes uncompressed exceeds the per-file limit of {max_member_bytes}"))
+                continue
+            if total + info.file_size > max_total_bytes:
+                skipped.append((info.filename, f"skipped, archive exceeds the total uncompressed limit of {max_total_bytes} bytes"))
+                continue
+            total += info.file_size
+            with zf.open(info) as member:
+                yield member
+
+
+def source_name(source):
+    return source if isinstance(source, str) else getattr(source, "name", repr(source))
+
+
+def resolve_sources(folder_or_sources):
+    # A folder path means every .xml in it and any other string is a glob pattern
+    # (e.g. "exports/**/*.xml"); anything else is already an iterable of paths and/or
+    # binary file-like objects
+    if isinstance(folder_or_sources, (str, os.PathLike)):
+        if os.path.isdir(folder_or_sources):
+            return list_xml_files(folder_or_sources)
+        return sorted(path for path in glob.glob(os.fspath(folder_or_sources), recursive=True) if os.path.isfile(path))
+    return folder_or_sources
+
+
+def _run_instrumented(func, source):
+    # Worker-side wrapper: metrics recorded in the child are shipped back with the result
+    with use_metrics(Metrics()) as metrics:
+        result = func(source)
+    return result, metrics.raw()
+
+
+def run_per_file(func, sources, workers=1, initializer=None, initargs=()):
+    # Returns (name, result, error) per source, always in the order of `sources`.
+    # Serial mode consumes `sources` lazily, so a generator of open streams works;
+    # the process pool needs a list of paths. `initializer(*initargs)` runs once in
+    # each pool worker.
+    results = []
+    if workers <= 1 or not isinstance(sources, list) or len(sources) <= 1:
+        for source in sources:
+            try:
+                results.append((source_name(source), func(source), None))
+            except Exception as e:
+                results.append((source_name(source), None, f"{type(e).__name__}: {e}"))
+        return results
+    paths = sources
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(paths)), initializer=initializer, initargs=initargs) as pool:
+        futures = [pool.submit(_run_instrumented, func, path) for path in paths]
+        for path, future in zip(paths, futures):
+            try:
+                result, worker_metrics = future.result()
+                METRICS.merge(worker_metrics)
+                results.append((path, result, None))
+            except Exception as e:
+                results.append((path, None, f"{type(e).__name__}: {e}"))
+    return results
+
+
+def report_failures(failures):
+    if not failures:
+        return
+    print(f"⚠️ {len(failures)} file(s) could not be fully processed:")
+    for path, error in failures:
+        print(f"   - {os.path.basename(path)}: {error}")
+
+
+def parse_all_xmls(folder_path, workers=1):
+    tickets = []
+    failures = []
+    for path, result, error in run_per_file(_parse_file, resolve_sources(folder_path), workers):
+        if result is None:
+            failures.append((path, error))
+        else:
+            tickets.extend(result)
+    return tickets, failures
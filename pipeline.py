@@ -0,0 +1,278 @@
+# pipeline.py
+#
+# The one ingest path shared by main.py and app.py:
+#   read + enrich (per file) -> cluster -> aggregate (store, manifest) -> write (all artifacts)
+# Every ticket is parsed, tagged and summarized once, and each artifact has its own file.
+
+import os
+import time
+import datetime
+import multiprocessing
+from functools import partial
+import pandas as pd
+from parser import resolve_sources, run_per_file, report_failures
+from conversation_analyzer import analyze_ticket_file
+from analyzer import compact_dtypes, write_output
+from summarizer import MAX_CONCURRENCY, share_llm_slots
+from manifest import TicketManifest, file_checksum
+from rule_engine import RULES
+from ticket_store import TicketStore, to_utc
+from trend_clusters import TrendClusterer, cluster_label
+from trend_windows import as_of_day, week_over_week, detect_spikes
+from instrumentation import METRICS
+
+ARTIFACTS = {
+    "metadata": "ticket_metadata_{today}",
+    "enriched": "ticket_analysis_output_{today}",
+    "categorized": "categorized_ticket_map_{today}",
+    "insights": "insights_report_{today}.txt",
+    "unmatched": "unmatched_samples_{today}.txt",
+}
+
+
+def store_row(entry):
+    metadata = entry["metadata"]
+    enriched = entry["enriched"]
+    return {
+        "ticket_id": entry["key"],
+        "subject": metadata["subject"],
+        "description": metadata["description"],
+        "agent_text": metadata["agent_text"],
+        "created_at": metadata["created_at"],
+        "created_utc": to_utc(metadata["created_at"]),
+        "updated_at": entry["updated_at"],
+        "priority": metadata["priority"],
+        "type": metadata["type"],
+        "group_id": metadata["group_id"],
+        "current_ticket_type": enriched["Current Ticket Type"],
+        "current_issue_type": metadata["current_issue_type"],
+        "ticket_type_tagged": enriched["Ticket Type (Auto Tagged)"],
+        "issue_type_tagged": enriched["Issue Type (Auto Tagged)"],
+        "trend_category": entry["category"],
+        "summary_problem": enriched["Summary of Problem Statement"],
+        "summary_resolution": enriched["Summary of Resolution (by agent)"],
+        # No hash until the summaries exist, so a later run's upsert replaces the placeholders
+        "content_hash": entry["hash"] if entry.get("summarized", True) else None,
+        "trend_cluster": enriched.get("Trend Cluster ID"),
+    }
+
+
+def enrich_sources(sources, workers=1, client=None, manifest_path=None, dedup=False, llm=True):
+    # Per-file results are merged in source order, so any worker count gives the same output.
+    # Also returns the sources with tickets left unsummarized, to be processed again later.
+    entries = []
+    failures = []
+    unfinished = []
+    analyze = partial(analyze_ticket_file, client=client, manifest_path=manifest_path, dedup=dedup, llm=llm)
+    # One pool of GPT request slots for all workers
+    slots = multiprocessing.BoundedSemaphore(MAX_CONCURRENCY) if workers > 1 else None
+    for path, result, error in run_per_file(analyze, sources, workers, share_llm_slots, (slots,)):
+        if result is None:
+            failures.append((path, error))
+            continue
+        if result["error"]:
+            failures.append((path, result["error"]))
+        if result["unfinished"]:
+            unfinished.append(path)
+        entries.extend(result["tickets"])
+    METRICS.count("tickets", len(entries))
+    return entries, failures, unfinished
+
+
+def cluster_entries(entries, model_path):
+    # Assigns this run's tickets to the persisted clusters, updating them as it goes.
+    # The id is kept on the enriched row so the manifest carries it for later runs.
+    with METRICS.stage("cluster"):
+        clusterer = TrendClusterer.load(model_path)
+        cluster_ids = clusterer.update([entry["text"] for entry in entries])
+        for entry, cluster_id in zip(entries, cluster_ids):
+            entry["enriched"]["Trend Cluster ID"] = cluster_id
+        clusterer.save(model_path)
+    return clusterer.labels()
+
+
+def aggregate(entries, store_path=None, manifest=None, cluster_labels=None, history=True):
+    # Folds this run's entries into the store and manifest, then groups the rows each
+    # artifact needs. With a manifest the artifacts cover every ticket seen so far;
+    # without one, or with history=False, they cover only this run's tickets. Trend and
+    # cluster counts always come from the same entries as the artifacts, never from the
+    # store, which also holds app uploads; only the windows (skipped with history=False)
+    # span every stored ticket.
+    windows = None
+    if store_path:
+        # The store is the system of record: ingest this run, then report from it
+        with METRICS.stage("store"):
+            store = TicketStore(store_path)
+            store.upsert([store_row(entry) for entry in entries])
+            if history:
+                # Windowed views come from the rollups the store keeps current at ingest
+                as_of = as_of_day(store)
+                windows = {
+                    "as_of": as_of.isoformat() if as_of else None,
+                    "week_over_week": week_over_week(store, as_of=as_of),
+                    "spikes": detect_spikes(store, as_of=as_of),
+                }
+            store.close()
+
+    if manifest is not None:
+        manifest.upsert_tickets(entries)
+        if history:
+            entries = manifest.iter_entries()
+
+    metadata_rows = []
+    enriched_rows = []
+    categorized_rows = []
+    unmatched = []
+    trend_map = {}
+    cluster_map = {}
+    for entry in entries:
+        if entry["metadata"] is not None:
+            metadata_rows.append(entry["metadata"])
+        enriched = entry["enriched"]
+        cluster_id = None
+        if cluster_labels is not None:
+            # Labels come from the current centroids, so older rows get the same names
+            cluster_id = enriched.setdefault("Trend Cluster ID", -1)
+            enriched["Trend Cluster"] = cluster_label(cluster_id, cluster_labels)
+            cluster_map[cluster_id] = cluster_map.get(cluster_id, 0) + 1
+        enriched_rows.append(enriched)
+        if entry["category"]:
+            trend_map.setdefault(entry["category"], []).append(entry["text"])
+            categorized_rows.append(entry["categorized"])
+        else:
+            unmatched.append((cluster_id, entry["text"]))
+
+    trend_counts = [
+        (category, len(samples))
+        for category, samples in sorted(trend_map.items(), key=lambda x: len(x[1]), reverse=True)
+    ]
+    cluster_counts = sorted(cluster_map.items(), key=lambda x: x[1], reverse=True)
+    return {
+        "metadata": compact_dtypes(pd.DataFrame(metadata_rows)),
+        "enriched": compact_dtypes(pd.DataFrame(enriched_rows)),
+        "categorized": compact_dtypes(pd.DataFrame(categorized_rows)),
+        "unmatched": unmatched,
+        "trend_counts": trend_counts,
+        "windows": windows,
+        "cluster_labels": cluster_labels,
+        "cluster_counts": [
+            (cluster_label(cluster_id, cluster_labels), n) for cluster_id, n in cluster_counts
+        ] if cluster_labels is not None else None,
+    }
+
+
+def write_artifacts(aggregates, output_dir=".", today=None, output_format="csv"):
+    today = today or datetime.datetime.now().strftime("%Y%m%d")
+    os.makedirs(output_dir, exist_ok=True)
+    paths = {name: os.path.join(output_dir, pattern.format(today=today)) for name, pattern in ARTIFACTS.items()}
+    outputs = {}
+
+    for name, created_col in [("metadata", "created_at"), ("enriched", "Created"), ("categorized", "Created At")]:
+        if not aggregates[name].empty:
+            outputs[name] = write_output(aggregates[name], paths[name], output_format, created_col=created_col)
+
+    with METRICS.stage("write"):
+        unmatched = aggregates["unmatched"]
+        cluster_labels = aggregates["cluster_labels"]
+        if unmatched:
+            with open(paths["unmatched"], "w") as f:
+                f.write("Unmatched Samples\n" + "=" * 20 + "\n\n")
+                if cluster_labels is None:
+                    for _, line in unmatched:
+                        f.write(f"{line}\n\n")
+                else:
+                    # Grouped by semantic cluster, largest group first
+                    groups = {}
+                    for cluster_id, line in unmatched:
+                        groups.setdefault(cluster_label(cluster_id, cluster_labels), []).append(line)
+                    for label, lines in sorted(groups.items(), key=lambda x: len(x[1]), reverse=True):
+                        f.write(f"## {label} ({len(lines)})\n\n")
+                        for line in lines:
+                            f.write(f"{line}\n\n")
+            outputs["unmatched"] = [paths["unmatched"]]
+
+        with open(paths["insights"], "w") as f:
+            f.write("Customer Support Trends Report\n")
+            f.write("=" * 40 + "\n")
+            f.write(f"Generated on: {today}\n\n")
+            for category, count in aggregates["trend_counts"]:
+                f.write(f"🔹 {category} ({count} occurrences)\n\n")
+            if aggregates["cluster_counts"] is not None:
+                f.write("\nSemantic Clusters (auto-labelled from ticket text)\n")
+                f.write("-" * 40 + "\n\n")
+                for label, count in aggregates["cluster_counts"]:
+                    f.write(f"🔸 {label} ({count} tickets)\n\n")
+            windows = aggregates["windows"]
+            if windows is not None and windows["as_of"]:
+                # Windows always span every stored ticket, not just the tickets above
+                f.write(f"\nLast 7 Days vs Previous 7 Days (all stored tickets, to {windows['as_of']})\n")
+                f.write("-" * 40 + "\n\n")
+                for category, current, previous, change in windows["week_over_week"]:
+                    trend = "new" if change is None else f"{change:+.1f}%"
+                    f.write(f"🔹 {category}: {current} (previous {previous}, {trend})\n")
+                f.write("\nSpikes vs Rolling Baseline (all stored tickets)\n")
+                f.write("-" * 40 + "\n\n")
+                if not windows["spikes"]:
+                    f.write("No categories above their baseline.\n")
+                for category, current, baseline, score in windows["spikes"]:
+                    f.write(f"⚠️ {category}: {current} tickets in the last 7 days vs a baseline of {baseline}/week (z = {score})\n")
+        outputs["insights"] = [paths["insights"]]
+    return outputs
+
+
+def run_pipeline(folder_path, output_dir=".", workers=1, client=None, manifest_path=None,
+                 output_format="csv", store_path=None, cluster_model_path=None, dedup=False, llm=True,
+                 write_outputs=True):
+    """Read, enrich, aggregate and write every artifact in a single pass over the sources.
+
+    `folder_path` is a folder of .xml exports or an iterable of paths / open XML streams.
+    With `cluster_model_path`, tickets are also grouped into semantic trend clusters by an
+    online model persisted at that path. With `dedup`, near-duplicate tickets within a file
+    are enriched once and the categorized map reports each ticket's duplicate group size.
+    With llm=False no GPT requests are made; summaries come from the cache or are marked skipped.
+    With write_outputs=False the run only ingests (manifest, store, clusters): nothing is
+    written and the returned frame holds just this run's tickets. Passing no sources with a
+    manifest rebuilds the full-history artifacts without reading any export.
+    Returns the run date, the ticket metadata and enriched frames (the tickets the
+    artifacts cover), per-file failures, the sources left with unsummarized tickets and
+    the written paths keyed by artifact name.
+    """
+    run_start = time.perf_counter()
+    today = datetime.datetime.now().strftime("%Y%m%d")
+
+    sources = resolve_sources(folder_path)
+    manifest = None
+    checksums = {}
+    if manifest_path:
+        # Incremental mode (file paths only): files already processed with this exact content are skipped
+        manifest = TicketManifest(manifest_path)
+        if manifest.reset_if_rules_changed(RULES.version()):
+            print("🔄 Tagging rules changed since the last run; re-tagging every ticket")
+        checksums = {path: file_checksum(path) for path in sources}
+        sources = [path for path in sources if not manifest.has_file(checksums[path])]
+        print(f"🔁 {len(sources)} new or changed file(s) to process")
+
+    try:
+        entries, failures, unfinished = enrich_sources(sources, workers, client, manifest_path, dedup, llm)
+        cluster_labels = cluster_entries(entries, cluster_model_path) if cluster_model_path else None
+        aggregates = aggregate(entries, store_path, manifest, cluster_labels, history=write_outputs)
+        if manifest is not None:
+            # A file is done only once every ticket in it has its summaries
+            retry = {path for path, _ in failures} | set(unfinished)
+            manifest.mark_files([(path, checksums[path]) for path in sources if path not in retry])
+            pending = sum(not entry.get("summarized", True) for entry in entries)
+            if pending:
+                print(f"⏳ {pending} ticket(s) without summaries will be retried on the next run")
+    finally:
+        if manifest is not None:
+            manifest.close()
+
+    outputs = write_artifacts(aggregates, output_dir, today, output_format) if write_outputs else {}
+
+    METRICS.add_time("pipeline", time.perf_counter() - run_start)
+    METRICS.count("failed_files", len(failures))
+    report_failures(failures)
+    return {
+        "today": today, "tickets": aggregates["metadata"], "enriched": aggregates["enriched"],
+        "failures": failures, "unfinished": unfinished, "outputs": outputs,
+    }
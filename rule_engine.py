@@ -0,0 +1,149 @@
+# rule_engine.py
+
+import hashlib
+import json
+import os
+import threading
+from keyword_matcher import KeywordMatcher
+from tagging_reference import TICKET_TYPE_REFERENCE, ISSUE_TYPE_REFERENCE
+
+RULES_PATH = os.getenv(
+    "TICKET_ANALYZER_RULES", os.path.join(os.path.dirname(os.path.abspath(__file__)), "tagging_rules.json")
+)
+
+# Rule sets in the rules file and the labels each may use (None = any label)
+RULE_SETS = {
+    "ticket_type": TICKET_TYPE_REFERENCE,
+    "issue_type": ISSUE_TYPE_REFERENCE,
+    "trend": None,
+}
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def validate_rules(doc):
+    """Every problem with a parsed rules document, as a list of messages."""
+    if not isinstance(doc, dict):
+        return ["top level must be an object of rule sets"]
+    errors = [f"unknown rule set {name!r}" for name in doc if name not in RULE_SETS]
+    for name, reference in RULE_SETS.items():
+        rule_set = doc.get(name)
+        if not isinstance(rule_set, dict) or not isinstance(rule_set.get("rules"), dict):
+            errors.append(f"{name}: missing or malformed 'rules' object")
+            continue
+        if not _is_number(rule_set.get("threshold", 1)) or rule_set.get("threshold", 1) <= 0:
+            errors.append(f"{name}: threshold must be a positive number")
+        for label, rule in rule_set["rules"].items():
+            where = f"{name} / {label}"
+            if reference is not None and label not in reference:
+                errors.append(f"{where}: label is not in tagging_reference.py")
+            if isinstance(rule, list):
+                rule = {"keywords": rule}
+            if not isinstance(rule, dict):
+                errors.append(f"{where}: rule must be a keyword list or an object")
+                continue
+            unknown = set(rule) - {"keywords", "threshold", "weights"}
+            if unknown:
+                errors.append(f"{where}: unknown fields {sorted(unknown)}")
+            keywords = rule.get("keywords")
+            if not isinstance(keywords, list) or not keywords or not all(
+                isinstance(word, str) and word.strip() for word in keywords
+            ):
+                errors.append(f"{where}: keywords must be a non-empty list of non-empty strings")
+                continue
+            if "threshold" in rule and (not _is_number(rule["threshold"]) or rule["threshold"] <= 0):
+                errors.append(f"{where}: threshold must be a positive number")
+            weights = rule.get("weights", {})
+            if not isinstance(weights, dict):
+                errors.append(f"{where}: weights must map keywords to numbers")
+                continue
+            lowered = {word.lower() for word in keywords}
+            for word, weight in weights.items():
+                if word.lower() not in lowered:
+                    errors.append(f"{where}: weight given for {word!r}, which is not one of its keywords")
+                elif not _is_number(weight) or weight <= 0:
+                    errors.append(f"{where}: weight of {word!r} must be a positive number")
+    return errors
+
+
+def compile_rules(doc):
+    # One KeywordMatcher per rule set; a rule's own threshold overrides its set's default
+    matchers = {}
+    for name in RULE_SETS:
+        rule_set = doc[name]
+        default = rule_set.get("threshold", 1)
+        keywords, weights, thresholds = {}, {}, {}
+        for label, rule in rule_set["rules"].items():
+            if isinstance(rule, list):
+                rule = {"keywords": rule}
+            keywords[label] = rule["keywords"]
+            weights[label] = rule.get("weights", {})
+            thresholds[label] = rule.get("threshold", default)
+        matchers[name] = KeywordMatcher(keywords, weights=weights, thresholds=thresholds)
+    return matchers
+
+
+def parse_rules(raw, path=RULES_PATH):
+    # Compiled matchers from the bytes of a rules file; `path` is only used in errors
+    doc = json.loads(raw)
+    errors = validate_rules(doc)
+    if errors:
+        raise ValueError(f"Invalid rules in {path}:\n" + "\n".join(f"  - {error}" for error in errors))
+    return compile_rules(doc)
+
+
+def load_rules(path=RULES_PATH):
+    with open(path, "rb") as f:
+        return parse_rules(f.read(), path)
+
+
+class RuleEngine:
+    """Compiled matchers for the rules file, recompiled whenever the file changes.
+
+    A change that fails to parse or validate, or a file that goes missing, is reported
+    and the last good rules stay in use, so a bad edit never takes tagging down.
+    """
+
+    def __init__(self, path=RULES_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._matchers = None
+        self._version = None
+
+    def _file_stamp(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def matchers(self):
+        stamp = self._file_stamp()
+        if stamp == self._stamp and self._matchers is not None:
+            return self._matchers
+        with self._lock:
+            if stamp != self._stamp or self._matchers is None:
+                try:
+                    with open(self.path, "rb") as f:
+                        raw = f.read()
+                    self._matchers = parse_rules(raw, self.path)
+                    self._version = hashlib.sha256(raw).hexdigest()
+                    if self._stamp is not None:
+                        print(f"🔄 Reloaded tagging rules from {self.path}")
+                except (ValueError, OSError) as e:
+                    if self._matchers is None:
+                        raise
+                    print(f"❌ Keeping previous tagging rules: {e}")
+                self._stamp = stamp
+        return self._matchers
+
+    def version(self):
+        # Digest of the rules in use; changes whenever their content does, e.g. to key caches on
+        self.matchers()
+        return self._version
+
+
+RULES = RuleEngine()
@@ -0,0 +1,178 @@
+# summarizer.py
+
+import contextlib
+import contextvars
+import hashlib
+import os
+import random
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from instrumentation import METRICS
+
+SUMMARY_MODEL = "gpt-3.5-turbo"
+CACHE_PATH = os.getenv("TICKET_ANALYZER_SUMMARY_CACHE", "summary_cache.db")
+# Upper bound on GPT requests in flight at once, across all worker processes
+MAX_CONCURRENCY = int(os.getenv("TICKET_ANALYZER_LLM_CONCURRENCY", "8"))
+MAX_RETRIES = 3
+# New summaries are written to the cache in batches of this size as they arrive
+CACHE_FLUSH_EVERY = int(os.getenv("TICKET_ANALYZER_CACHE_FLUSH_EVERY", "200"))
+# Errors worth retrying; anything else (bad key, context too long) fails the same way every time
+TRANSIENT_ERRORS = ("RateLimitError", "APIError", "Timeout", "ServiceUnavailableError", "APIConnectionError")
+
+NOT_ENOUGH_CONTENT = "Not enough content"
+FAILED_SUMMARY = "Could not summarize"
+SKIPPED_SUMMARY = "Not summarized (LLM disabled)"
+# Stand-ins for a summary that a later run should still try to produce
+UNFINISHED_SUMMARIES = (FAILED_SUMMARY, SKIPPED_SUMMARY)
+
+
+def cache_key(model, instruction, text):
+    digest = hashlib.sha256()
+    for part in (model, instruction, text):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class SummaryCache:
+    """SQLite-backed summary store keyed on a hash of model, instruction and text."""
+
+    def __init__(self, path=CACHE_PATH):
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS summaries ("
+            " key TEXT PRIMARY KEY, model TEXT, summary TEXT, created_at REAL)"
+        )
+        self.conn.commit()
+
+    def get_many(self, keys):
+        found = {}
+        keys = list(keys)
+        # Stay well below SQLite's bound-parameter limit
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT key, summary FROM summaries WHERE key IN ({placeholders})", chunk
+            )
+            found.update(rows)
+        return found
+
+    def put_many(self, model, summaries):
+        now = time.time()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO summaries (key, model, summary, created_at) VALUES (?, ?, ?, ?)",
+            [(key, model, summary, now) for key, summary in summaries.items()],
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+def _default_client():
+    import openai
+    return openai.ChatCompletion
+
+
+def _transient_errors():
+    from openai import error
+    return tuple(getattr(error, name) for name in TRANSIENT_ERRORS)
+
+
+# Process-shared semaphore installed in every pool worker by share_llm_slots, so the
+# MAX_CONCURRENCY limit holds for the whole run rather than per process
+_llm_slots = None
+
+
+def share_llm_slots(slots):
+    # ProcessPoolExecutor initializer
+    global _llm_slots
+    _llm_slots = slots
+
+
+def _request_summary(client, model, instruction, content):
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            with _llm_slots or contextlib.nullcontext():
+                start = time.perf_counter()
+                METRICS.count("llm_calls")
+                response = client.create(
+                    model=model,
+                    messages=[
+                        {"role": "system", "content": instruction},
+                        {"role": "user", "content": content}
+                    ],
+                    max_tokens=100,
+                    temperature=0.3
+                )
+                METRICS.observe("llm_latency", time.perf_counter() - start)
+            return response.choices[0].message.content.strip()
+        except Exception as e:
+            METRICS.count("llm_errors")
+            if attempt == MAX_RETRIES or not isinstance(e, _transient_errors()):
+                print(f"❌ GPT summarization failed: {e}")
+                return None
+            # Exponential backoff with jitter so parallel retries don't arrive together
+            time.sleep((2 ** attempt) + random.random())
+
+
+def summarize_many(requests, client=None, cache=None, model=SUMMARY_MODEL, max_concurrency=MAX_CONCURRENCY, llm=True):
+    """Summarize (content, instruction) pairs, returning summaries in the same order.
+
+    Cached summaries are reused; misses are deduplicated and sent to the client
+    in parallel, and successful responses are written back to the cache as they
+    arrive, so an interrupted run keeps what it already fetched.
+    With llm=False no requests are made and misses get SKIPPED_SUMMARY.
+    """
+    with METRICS.stage("summarize"):
+        return _summarize_many(requests, client, cache, model, max_concurrency, llm)
+
+
+def _summarize_many(requests, client, cache, model, max_concurrency, llm):
+    results = [None] * len(requests)
+    pending = {}
+    for i, (content, instruction) in enumerate(requests):
+        if not content or len(content.strip()) < 10:
+            results[i] = NOT_ENOUGH_CONTENT
+            continue
+        key = cache_key(model, instruction, content)
+        pending.setdefault(key, (content, instruction, []))[2].append(i)
+
+    cached = cache.get_many(pending) if cache is not None and pending else {}
+    misses = {key: job for key, job in pending.items() if key not in cached}
+    METRICS.count("summary_cache_hits", len(cached))
+    METRICS.count("summary_cache_misses", len(misses))
+
+    fetched = {}
+    if misses and llm:
+        client = client or _default_client()
+        pool = ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(misses))))
+        unsaved = {}
+        try:
+            # Each request runs in a copy of this context, so it records into this run's metrics
+            futures = {
+                pool.submit(contextvars.copy_context().run, _request_summary, client, model, instruction, content): key
+                for key, (content, instruction, _) in misses.items()
+            }
+            for future in as_completed(futures):
+                summary = future.result()
+                if summary is None:
+                    continue
+                fetched[futures[future]] = unsaved[futures[future]] = summary
+                if cache is not None and len(unsaved) >= CACHE_FLUSH_EVERY:
+                    cache.put_many(model, unsaved)
+                    unsaved = {}
+        finally:
+            # On Ctrl+C, drop the requests not yet sent but keep every summary already paid for
+            pool.shutdown(wait=False, cancel_futures=True)
+            if cache is not None and unsaved:
+                cache.put_many(model, unsaved)
+
+    missing = FAILED_SUMMARY if llm else SKIPPED_SUMMARY
+    for key, (_, _, indexes) in pending.items():
+        summary = cached.get(key, fetched.get(key, missing))
+        for i in indexes:
+            results[i] = summary
+    return results
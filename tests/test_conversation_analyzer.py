@@ -0,0 +1,36 @@
+import os
+import sys
+import pyarrow as pa
+from analyzer import analyze_tickets
+from conversation_analyzer import analyze_ticket_file, classify_tag, tag_tickets
+from parser import parse_ticket_xml
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from synthetic_export import write_export  # noqa: E402
+
+
+def test_tag_tickets_accepts_the_analyze_tickets_frame(tmp_path):
+    (path,) = write_export(str(tmp_path), 300, seed=5)
+    df = analyze_tickets(parse_ticket_xml(path))
+    expected = {
+        "Ticket Type (Auto Tagged)": [classify_tag(text, "ticket_type") for text in df["combined_text"]],
+        "Issue Type (Auto Tagged)": [classify_tag(notes, "issue_type") for notes in df["agent_text"]],
+        "Trend Category": [
+            None if tag == "Unknown" else tag for tag in (classify_tag(text, "trend") for text in df["combined_text"])
+        ],
+    }
+    assert set(expected["Issue Type (Auto Tagged)"]) != {"Unknown"}
+    for tickets in (df, pa.Table.from_pandas(df)):
+        tagged = tag_tickets(tickets)
+        assert len(tagged) == len(df)
+        for column, values in expected.items():
+            assert tagged[column].tolist() == values, column
+
+
+def test_chunked_files_give_the_same_entries(tmp_path, monkeypatch):
+    (path,) = write_export(str(tmp_path / "exports"), 250, seed=6)
+    monkeypatch.chdir(tmp_path)
+    whole = analyze_ticket_file(path, llm=False, chunk_size=1000)
+    chunked = analyze_ticket_file(path, llm=False, chunk_size=7)
+    assert len(whole["tickets"]) == 250
+    assert chunked == whole
@@ -0,0 +1,37 @@
+import threading
+from instrumentation import METRICS, Metrics, use_metrics
+from summarizer import summarize_many
+from test_summarizer import StubClient
+
+
+def test_concurrent_runs_record_into_their_own_metrics():
+    start = threading.Barrier(2)
+    results = {}
+
+    def run(name, n):
+        with use_metrics(Metrics()) as metrics:
+            start.wait()
+            for i in range(n):
+                METRICS.count("tickets")
+            # Requests run on the summarizer's own threads
+            summarize_many([(f"{name} ticket {i} text", "p") for i in range(n)], client=StubClient())
+            with METRICS.stage("write"):
+                pass
+        results[name] = metrics.summary()
+
+    before = METRICS.summary()["counters"]
+    threads = [threading.Thread(target=run, args=(name, n)) for name, n in [("first", 3), ("second", 5)]]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for name, n in [("first", 3), ("second", 5)]:
+        counters = results[name]["counters"]
+        assert counters["tickets"] == n
+        assert counters["llm_calls"] == n
+        assert counters["summary_cache_misses"] == n
+        assert results[name]["latencies"]["llm_latency"]["count"] == n
+        assert results[name]["stages"]["write"]["calls"] == 1
+    # Nothing leaked into the process-wide default
+    assert METRICS.summary()["counters"] == before
@@ -0,0 +1,81 @@
+import json
+import random
+import pytest
+from keyword_matcher import KeywordMatcher
+from rule_engine import RULES_PATH, load_rules
+
+
+def score_keywords(text, keywords):
+    # The original per-category scoring
+    text_lower = text.lower()
+    return sum(1 for word in keywords if word.lower() in text_lower)
+
+
+def legacy_best(text, rules, threshold):
+    # The original dict loop: first category with the highest score at or above the threshold
+    best_match = None
+    best_score = 0
+    for category, keywords in rules.items():
+        score = score_keywords(text.lower(), keywords)
+        if score >= threshold and score > best_score:
+            best_match = category
+            best_score = score
+    return best_match
+
+
+def rule_sets():
+    with open(RULES_PATH, encoding="utf-8") as f:
+        doc = json.load(f)
+    for name, rule_set in doc.items():
+        rules = {
+            label: rule if isinstance(rule, list) else rule["keywords"]
+            for label, rule in rule_set["rules"].items()
+        }
+        yield name, rules, rule_set.get("threshold", 1)
+
+
+def random_texts(rules, n, seed=0):
+    rng = random.Random(seed)
+    keywords = sorted({word for words in rules.values() for word in words})
+    filler = ["the", "customer", "says", "report", "reporting", "port", "api", "an", "issue", "since", "monday"]
+    texts = []
+    for _ in range(n):
+        words = rng.sample(keywords, rng.randint(0, 6)) + rng.sample(filler, rng.randint(0, 5))
+        rng.shuffle(words)
+        # Mixed case and glued words, so substring matches inside other words are covered
+        words = [word.upper() if rng.random() < 0.2 else word.title() if rng.random() < 0.2 else word for word in words]
+        texts.append(rng.choice([" ", "", "-"]).join(words))
+    return texts
+
+
+@pytest.mark.parametrize("name, rules, threshold", list(rule_sets()), ids=[name for name, _, _ in rule_sets()])
+def test_shipped_rules_match_the_dict_loops(name, rules, threshold):
+    matcher = KeywordMatcher(rules, thresholds={category: threshold for category in rules})
+    texts = random_texts(rules, 3000)
+    expected = [legacy_best(text, rules, threshold) for text in texts]
+    assert [matcher.best(text) for text in texts] == expected
+    assert matcher.best_many(texts) == expected
+
+
+def test_compiled_rules_file_matches_the_dict_loops():
+    matchers = load_rules()
+    for name, rules, threshold in rule_sets():
+        texts = random_texts(rules, 500, seed=1)
+        assert matchers[name].best_many(texts) == [legacy_best(text, rules, threshold) for text in texts]
+
+
+def test_overlapping_prefixes_all_count():
+    rules = {"Reports": ["report", "Reporting", "reports"], "Ports": ["port", "REPORTING"], "Other": ["orting"]}
+    matcher = KeywordMatcher(rules)
+    for text in ["REPORTING failed", "reports", "a report", "Port 25 blocked", "reportingreport", "sporting", ""]:
+        assert matcher.scores(text) == [score_keywords(text, words) for words in rules.values()]
+        assert matcher.best(text) == legacy_best(text, rules, 1)
+        assert matcher.best_many([text]) == [legacy_best(text, rules, 1)]
+
+
+def test_ties_go_to_the_first_category():
+    rules = {"First": ["bounce", "spam"], "Second": ["spam", "bounce"], "Third": ["bounce"]}
+    matcher = KeywordMatcher(rules)
+    assert matcher.best("BOUNCE and Spam") == "First"
+    assert matcher.best_many(["BOUNCE and Spam", "bounce"]) == ["First", "First"]
+    assert matcher.best_many(["nothing here"], threshold=1) == [None]
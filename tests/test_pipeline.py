@@ -0,0 +1,56 @@
+import os
+import re
+import sys
+from collections import Counter
+import pandas as pd
+from pipeline import run_pipeline
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from run_benchmarks import StubChatClient  # noqa: E402
+from synthetic_export import write_export  # noqa: E402
+
+
+def run_outputs(exports, workdir, workers, monkeypatch):
+    # A fresh folder per run, so each has its own summary cache, manifest, store and model
+    os.makedirs(workdir)
+    monkeypatch.chdir(workdir)
+    result = run_pipeline(
+        exports, output_dir="out", workers=workers, client=StubChatClient(), manifest_path="manifest.db",
+        output_format="csv", store_path="store.db", cluster_model_path="clusters.pkl", dedup=True,
+    )
+    assert not result["failures"]
+    return {
+        os.path.basename(path): open(os.path.join(workdir, path), "rb").read()
+        for paths in result["outputs"].values() for path in paths
+    }
+
+
+def test_parallel_outputs_are_byte_identical_to_serial(tmp_path, monkeypatch):
+    exports = str(tmp_path / "exports")
+    write_export(exports, 900, files=3, seed=3)
+    serial = run_outputs(exports, str(tmp_path / "serial"), 1, monkeypatch)
+    parallel = run_outputs(exports, str(tmp_path / "parallel"), 3, monkeypatch)
+    assert serial
+    assert serial.keys() == parallel.keys()
+    for name in serial:
+        assert serial[name] == parallel[name], name
+
+
+def test_report_counts_match_the_categorized_map_despite_other_store_rows(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (upload,) = write_export(str(tmp_path / "upload"), 200, seed=7, first_id=1000)
+    (export,) = write_export(str(tmp_path / "exports"), 300, seed=8)
+    # An app upload: stored, but not part of the manifest the CLI reports on
+    run_pipeline([upload], output_dir="app", client=StubChatClient(), store_path="store.db")
+    result = run_pipeline(
+        [export], output_dir="out", client=StubChatClient(), manifest_path="manifest.db",
+        store_path="store.db", cluster_model_path="clusters.pkl",
+    )
+    (categorized_path,) = result["outputs"]["categorized"]
+    categorized = pd.read_csv(categorized_path)
+    with open(result["outputs"]["insights"][0], encoding="utf-8") as f:
+        report = f.read()
+    trends = {name: int(n) for name, n in re.findall(r"🔹 (.+) \((\d+) occurrences\)", report)}
+    clusters = [int(n) for n in re.findall(r"🔸 .+ \((\d+) tickets\)", report)]
+    assert trends == dict(Counter(categorized["Category"]))
+    assert sum(clusters) == len(result["tickets"]) == len(result["enriched"]) == 300
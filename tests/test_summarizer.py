@@ -0,0 +1,107 @@
+import types
+import pytest
+from openai import error
+import summarizer
+from summarizer import FAILED_SUMMARY, NOT_ENOUGH_CONTENT, SKIPPED_SUMMARY, SummaryCache, summarize_many
+
+
+class StubClient:
+    """Stands in for openai.ChatCompletion; raises the queued errors first, then answers."""
+
+    def __init__(self, errors=()):
+        self.errors = list(errors)
+        self.calls = []
+
+    def create(self, model, messages, **kwargs):
+        self.calls.append(messages[-1]["content"])
+        if self.errors:
+            raise self.errors.pop(0)
+        content = "Summary of " + messages[-1]["content"]
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=types.SimpleNamespace(content=content))])
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(summarizer.time, "sleep", lambda seconds: None)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = SummaryCache(str(tmp_path / "summary_cache.db"))
+    yield cache
+    cache.close()
+
+
+def test_summaries_keep_request_order_and_skip_short_texts():
+    client = StubClient()
+    requests = [("first ticket text", "p"), ("short", "p"), ("second ticket text", "r")]
+    assert summarize_many(requests, client=client) == [
+        "Summary of first ticket text", NOT_ENOUGH_CONTENT, "Summary of second ticket text"
+    ]
+    assert len(client.calls) == 2
+
+
+def test_cached_and_duplicate_texts_are_requested_once(cache):
+    client = StubClient()
+    requests = [("the same ticket text", "p")] * 3
+    summarize_many(requests, client=client, cache=cache)
+    assert summarize_many(requests, client=client, cache=cache) == ["Summary of the same ticket text"] * 3
+    assert len(client.calls) == 1
+
+
+def test_transient_errors_are_retried():
+    client = StubClient([error.RateLimitError("slow down"), error.APIConnectionError("reset")])
+    assert summarize_many([("a ticket worth summarizing", "p")], client=client) == [
+        "Summary of a ticket worth summarizing"
+    ]
+    assert len(client.calls) == 3
+
+
+@pytest.mark.parametrize("failure", [error.AuthenticationError("no key"), error.InvalidRequestError("too long", None)])
+def test_permanent_errors_fail_without_retrying(failure, cache):
+    client = StubClient([failure])
+    assert summarize_many([("a ticket worth summarizing", "p")], client=client, cache=cache) == [FAILED_SUMMARY]
+    assert len(client.calls) == 1
+    # Failures are not cached, so the next run asks again
+    assert summarize_many([("a ticket worth summarizing", "p")], client=client, cache=cache) == [
+        "Summary of a ticket worth summarizing"
+    ]
+
+
+def test_retries_give_up_after_max_retries():
+    client = StubClient([error.ServiceUnavailableError("down")] * (summarizer.MAX_RETRIES + 1))
+    assert summarize_many([("a ticket worth summarizing", "p")], client=client) == [FAILED_SUMMARY]
+    assert len(client.calls) == summarizer.MAX_RETRIES + 1
+
+
+def test_llm_off_uses_only_the_cache(cache):
+    client = StubClient()
+    summarize_many([("an already summarized ticket", "p")], client=client, cache=cache)
+    requests = [("an already summarized ticket", "p"), ("a brand new ticket text", "p")]
+    assert summarize_many(requests, client=client, cache=cache, llm=False) == [
+        "Summary of an already summarized ticket", SKIPPED_SUMMARY
+    ]
+    assert len(client.calls) == 1
+
+
+class InterruptedClient(StubClient):
+    """Answers `answers` requests, then behaves as if Ctrl+C hit mid-request."""
+
+    def __init__(self, answers):
+        super().__init__()
+        self.answers = answers
+
+    def create(self, model, messages, **kwargs):
+        if len(self.calls) == self.answers:
+            raise KeyboardInterrupt
+        return super().create(model, messages, **kwargs)
+
+
+def test_interrupted_runs_keep_the_summaries_already_fetched(cache, monkeypatch):
+    monkeypatch.setattr(summarizer, "CACHE_FLUSH_EVERY", 3)
+    requests = [(f"ticket number {i} text", "p") for i in range(8)]
+    with pytest.raises(KeyboardInterrupt):
+        summarize_many(requests, client=InterruptedClient(4), cache=cache, max_concurrency=1)
+    client = StubClient()
+    summarize_many(requests, client=client, cache=cache)
+    assert len(client.calls) == 4
@@ -0,0 +1,45 @@
+import watcher
+from watcher import FolderWatcher
+
+
+def drain(folder_watcher):
+    queued = []
+    while not folder_watcher.queue.empty():
+        queued.append(folder_watcher.queue.get_nowait())
+    return queued
+
+
+def test_files_are_queued_once_until_retried(tmp_path, monkeypatch):
+    path = tmp_path / "export.xml"
+    path.write_text("<helpdesk-tickets/>")
+    folder_watcher = FolderWatcher(str(tmp_path), retry_seconds=10)
+    now = [1000.0]
+    monkeypatch.setattr(watcher.time, "monotonic", lambda: now[0])
+
+    folder_watcher.poll()
+    assert drain(folder_watcher) == []
+    folder_watcher.poll()
+    assert drain(folder_watcher) == [str(path)]
+    folder_watcher.poll()
+    assert drain(folder_watcher) == []
+
+    # Unchanged but unfinished: queued again once the delay has passed
+    assert folder_watcher.retry([str(path)]) == {str(path): 10}
+    folder_watcher.poll()
+    assert drain(folder_watcher) == []
+    now[0] += 10
+    folder_watcher.poll()
+    assert drain(folder_watcher) == [str(path)]
+    folder_watcher.poll()
+    assert drain(folder_watcher) == []
+
+    # The delay doubles per retry, up to the cap, and starts over once the file changes
+    assert folder_watcher.retry([str(path)]) == {str(path): 20}
+    for _ in range(10):
+        delays = folder_watcher.retry([str(path)])
+    assert delays == {str(path): watcher.RETRY_MAX_SECONDS}
+    path.write_text("<helpdesk-tickets></helpdesk-tickets>")
+    folder_watcher.poll()
+    folder_watcher.poll()
+    assert drain(folder_watcher) == [str(path)]
+    assert folder_watcher.retry([str(path)]) == {str(path): 10}
@@ -0,0 +1,271 @@
+# ticket_store.py
+
+import datetime
+import os
+import sqlite3
+import pandas as pd
+
+STORE_PATH = os.getenv("TICKET_ANALYZER_STORE", "ticket_store.db")
+
+# Columns of the tickets table, in insert order
+STORE_COLUMNS = [
+    "ticket_id", "subject", "description", "agent_text", "created_at", "created_utc", "updated_at",
+    "priority", "type", "group_id", "current_ticket_type", "current_issue_type",
+    "ticket_type_tagged", "issue_type_tagged", "trend_category",
+    "summary_problem", "summary_resolution", "content_hash", "trend_cluster",
+]
+
+# Columns computed by enrichment rather than read from the export
+DERIVED_COLUMNS = [
+    "ticket_type_tagged", "issue_type_tagged", "trend_category",
+    "summary_problem", "summary_resolution", "trend_cluster",
+]
+
+# Columns that can be grouped on or filtered by equality
+INDEXED_COLUMNS = [
+    "created_utc", "group_id", "priority", "type",
+    "ticket_type_tagged", "issue_type_tagged", "trend_category", "trend_cluster",
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tickets (
+    ticket_id TEXT PRIMARY KEY,
+    subject TEXT, description TEXT, agent_text TEXT,
+    created_at TEXT, created_utc TEXT, updated_at TEXT,
+    priority TEXT, type TEXT, group_id TEXT,
+    current_ticket_type TEXT, current_issue_type TEXT,
+    ticket_type_tagged TEXT, issue_type_tagged TEXT, trend_category TEXT,
+    summary_problem TEXT, summary_resolution TEXT,
+    content_hash TEXT, trend_cluster INTEGER
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS tickets_fts USING fts5(
+    subject, description, agent_text, content='tickets', content_rowid='rowid'
+);
+CREATE TRIGGER IF NOT EXISTS tickets_ai AFTER INSERT ON tickets BEGIN
+    INSERT INTO tickets_fts(rowid, subject, description, agent_text)
+    VALUES (new.rowid, new.subject, new.description, new.agent_text);
+END;
+CREATE TRIGGER IF NOT EXISTS tickets_ad AFTER DELETE ON tickets BEGIN
+    INSERT INTO tickets_fts(tickets_fts, rowid, subject, description, agent_text)
+    VALUES ('delete', old.rowid, old.subject, old.description, old.agent_text);
+END;
+CREATE TRIGGER IF NOT EXISTS tickets_au AFTER UPDATE ON tickets BEGIN
+    INSERT INTO tickets_fts(tickets_fts, rowid, subject, description, agent_text)
+    VALUES ('delete', old.rowid, old.subject, old.description, old.agent_text);
+    INSERT INTO tickets_fts(rowid, subject, description, agent_text)
+    VALUES (new.rowid, new.subject, new.description, new.agent_text);
+END;
+""" + "".join(
+    f"CREATE INDEX IF NOT EXISTS idx_tickets_{col} ON tickets({col});\n" for col in INDEXED_COLUMNS
+)
+
+# Ticket counts by period x trend category x group x priority, kept current by triggers as
+# tickets are inserted, re-tagged or deleted. Days and weeks (starting Monday) are in UTC;
+# unmatched tickets count under the category ''.
+ROLLUP_PERIODS = {
+    "day": "date({row}.created_utc)",
+    "week": "date({row}.created_utc, 'weekday 0', '-6 days')",
+}
+_ROLLUP_KEY = "COALESCE({row}.trend_category, ''), COALESCE({row}.group_id, ''), COALESCE({row}.priority, '')"
+
+
+def _rollup_add(row):
+    return "".join(
+        f"INSERT INTO trend_rollups (period, period_start, category, group_id, priority, tickets) "
+        f"SELECT '{period}', {start.format(row=row)}, {_ROLLUP_KEY.format(row=row)}, 1 "
+        f"WHERE {row}.created_utc IS NOT NULL "
+        f"ON CONFLICT DO UPDATE SET tickets = tickets + 1;\n"
+        for period, start in ROLLUP_PERIODS.items()
+    )
+
+
+def _rollup_remove(row):
+    return "".join(
+        f"UPDATE trend_rollups SET tickets = tickets - 1 "
+        f"WHERE period = '{period}' AND period_start = {start.format(row=row)} "
+        f"AND (category, group_id, priority) = ({_ROLLUP_KEY.format(row=row)});\n"
+        for period, start in ROLLUP_PERIODS.items()
+    )
+
+
+ROLLUP_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS trend_rollups (
+    period TEXT NOT NULL, period_start TEXT NOT NULL,
+    category TEXT NOT NULL, group_id TEXT NOT NULL, priority TEXT NOT NULL,
+    tickets INTEGER NOT NULL,
+    PRIMARY KEY (period, period_start, category, group_id, priority)
+) WITHOUT ROWID;
+CREATE TRIGGER IF NOT EXISTS rollups_ai AFTER INSERT ON tickets BEGIN
+{_rollup_add("new")}END;
+CREATE TRIGGER IF NOT EXISTS rollups_ad AFTER DELETE ON tickets BEGIN
+{_rollup_remove("old")}END;
+CREATE TRIGGER IF NOT EXISTS rollups_au
+AFTER UPDATE OF created_utc, trend_category, group_id, priority ON tickets BEGIN
+{_rollup_remove("old")}{_rollup_add("new")}END;
+"""
+
+
+def to_utc(created_at):
+    # Sortable UTC form of Freshdesk's ISO timestamps, so date ranges can use the index
+    try:
+        parsed = datetime.datetime.fromisoformat(created_at)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return parsed.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def fts_query(text):
+    # Quote every term so user input can't be read as FTS5 query syntax
+    return " ".join('"' + term.replace('"', '""') + '"' for term in text.split())
+
+
+class TicketStore:
+    """Indexed SQLite store of every ingested ticket, with full-text search."""
+
+    def __init__(self, path=STORE_PATH):
+        # Readers such as the Streamlit app share one connection across script threads
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        # Stores created before trend clustering existed
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(tickets)")}
+        if columns and "trend_cluster" not in columns:
+            self.conn.execute("ALTER TABLE tickets ADD COLUMN trend_cluster INTEGER")
+        has_rollups = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'trend_rollups'"
+        ).fetchone()
+        self.conn.executescript(SCHEMA + ROLLUP_SCHEMA)
+        if columns and not has_rollups:
+            # Stores created before rollups existed are backfilled once
+            self.rebuild_rollups()
+        self.conn.commit()
+
+    def rebuild_rollups(self):
+        self.conn.execute("DELETE FROM trend_rollups")
+        for period, start in ROLLUP_PERIODS.items():
+            self.conn.execute(
+                f"INSERT INTO trend_rollups (period, period_start, category, group_id, priority, tickets) "
+                f"SELECT '{period}', {start.format(row='tickets')}, {_ROLLUP_KEY.format(row='tickets')}, COUNT(*) "
+                f"FROM tickets WHERE created_utc IS NOT NULL GROUP BY 2, 3, 4, 5"
+            )
+        self.conn.commit()
+
+    def upsert(self, rows):
+        # Idempotent: re-ingesting an unchanged ticket with unchanged tags, summaries and
+        # cluster is a no-op, but a re-tag (e.g. after a rules edit) is always applied
+        columns = ", ".join(STORE_COLUMNS)
+        placeholders = ", ".join("?" * len(STORE_COLUMNS))
+        updates = ", ".join(f"{col} = excluded.{col}" for col in STORE_COLUMNS[1:])
+        changed = " OR ".join(f"tickets.{col} IS NOT excluded.{col}" for col in ["content_hash"] + DERIVED_COLUMNS)
+        self.conn.executemany(
+            f"INSERT INTO tickets ({columns}) VALUES ({placeholders}) "
+            f"ON CONFLICT(ticket_id) DO UPDATE SET {updates} "
+            f"WHERE {changed}",
+            [tuple(row.get(col) for col in STORE_COLUMNS) for row in rows],
+        )
+        self.conn.commit()
+
+    def _where(self, group_ids=None, types=None, since=None, until=None, text=None, **equals):
+        clauses = []
+        params = []
+        if group_ids:
+            clauses.append(f"group_id IN ({','.join('?' * len(group_ids))})")
+            params.extend(group_ids)
+        if types:
+            clauses.append(f"type IN ({','.join('?' * len(types))})")
+            params.extend(types)
+        if since:
+            clauses.append("created_utc >= ?")
+            params.append(since)
+        if until:
+            clauses.append("created_utc < ?")
+            params.append(until)
+        for col, value in equals.items():
+            if col not in INDEXED_COLUMNS:
+                raise ValueError(f"Cannot filter on {col!r}")
+            clauses.append(f"{col} = ?")
+            params.append(value)
+        if text and text.strip():
+            clauses.append("rowid IN (SELECT rowid FROM tickets_fts WHERE tickets_fts MATCH ?)")
+            params.append(fts_query(text))
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(self, limit=None, **filters):
+        where, params = self._where(**filters)
+        sql = f"SELECT * FROM tickets{where} ORDER BY created_utc DESC"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        return pd.read_sql_query(sql, self.conn, params=params)
+
+    def count_by(self, column, **filters):
+        if column not in INDEXED_COLUMNS:
+            raise ValueError(f"Cannot group on {column!r}")
+        where, params = self._where(**filters)
+        rows = self.conn.execute(
+            f"SELECT {column}, COUNT(*) AS n FROM tickets{where} GROUP BY {column} ORDER BY n DESC, {column}",
+            params,
+        )
+        return rows.fetchall()
+
+    def count(self, **filters):
+        where, params = self._where(**filters)
+        return self.conn.execute(f"SELECT COUNT(*) FROM tickets{where}", params).fetchone()[0]
+
+    def rollup_counts(self, by="category", period="day", since=None, until=None, group_ids=None, priorities=None):
+        """Ticket counts per `by` (category, group_id, priority or period_start) from the rollups.
+
+        `since`/`until` are YYYY-MM-DD period starts (inclusive/exclusive), so "last N days"
+        and week-over-week questions never touch the tickets table.
+        """
+        if by not in ("category", "group_id", "priority", "period_start"):
+            raise ValueError(f"Cannot roll up by {by!r}")
+        if period not in ROLLUP_PERIODS:
+            raise ValueError(f"Unknown rollup period {period!r}, expected one of {tuple(ROLLUP_PERIODS)}")
+        clauses = ["period = ?"]
+        params = [period]
+        if since:
+            clauses.append("period_start >= ?")
+            params.append(since)
+        if until:
+            clauses.append("period_start < ?")
+            params.append(until)
+        for col, values in (("group_id", group_ids), ("priority", priorities)):
+            if values:
+                clauses.append(f"{col} IN ({','.join('?' * len(values))})")
+                params.extend(values)
+        rows = self.conn.execute(
+            f"SELECT {by}, SUM(tickets) AS n FROM trend_rollups WHERE {' AND '.join(clauses)} "
+            f"GROUP BY {by} HAVING n > 0 ORDER BY n DESC, {by}",
+            params,
+        )
+        return rows.fetchall()
+
+    def daily_category_counts(self, since=None, until=None, group_ids=None):
+        # (day, category, tickets) rows, for windowed comparisons and spike detection. Rows
+        # emptied by re-tags stay in the rollups at 0 and are left out.
+        clauses = ["period = 'day'"]
+        params = []
+        if since:
+            clauses.append("period_start >= ?")
+            params.append(since)
+        if until:
+            clauses.append("period_start < ?")
+            params.append(until)
+        if group_ids:
+            clauses.append(f"group_id IN ({','.join('?' * len(group_ids))})")
+            params.extend(group_ids)
+        rows = self.conn.execute(
+            f"SELECT period_start, category, SUM(tickets) FROM trend_rollups WHERE {' AND '.join(clauses)} "
+            f"GROUP BY period_start, category HAVING SUM(tickets) > 0",
+            params,
+        )
+        return rows.fetchall()
+
+    def latest_day(self):
+        row = self.conn.execute(
+            "SELECT MAX(period_start) FROM trend_rollups WHERE period = 'day' AND tickets > 0"
+        ).fetchone()
+        return row[0]
+
+    def close(self):
+        self.conn.close()
@@ -1 +0,0 @@
-TREND_KEYWORDS = {'SMS Delivery Issues': ['sms', 'delivered', 'not received', 'operator', 'airtel', 'delivery report', 'failed', 'retry'], 'Campaign Setup Errors': ['campaign', 'setup', 'segment', 'not running', 'target', 'audience', 'criteria', 'condition'], 'Webhook Problems': ['webhook', 'callback', 'firing', '2.0', 'message id', 'not received', 'trigger'], 'Live Feed Issues': ['live feed', 'dashboard', 'not showing', 'missing', 'reporting', 'data not available'], 'UI Display Issues': ['render', 'not displaying', 'inconsistent', 'web message', 'popup', 'delay', 'timeout'], 'Invoice or Billing Requests': ['invoice', 'billing', 'submit', 'follow-up', 'payment', 'amount', 'raise'], 'Reporting Requests': ['report', 'campaign wise', 'data dump', 'metrics', 'open rate', 'click rate'], 'WhatsApp Channel Errors': ['whatsapp', 'waba', 'template', 'approved', 'block', 'failed', 'restricted'], 'Domain/IP Warnings': ['domain', 'ip', 'conflict', 'reputation', 'rbl', 'blacklist', 'bounce'], 'Phishing or Spam': ['click here', 'verify account', 'urgent', 'phishing', 'fraud', 'security'], 'Order Processing': ['order', 'submitted', 'approval', 'salesforce', 'or -', 'pending', 'rejected'], 'CHUB Report Requests': ['chub', 'netcore', 'delivery count', 'request count', 'axis', 'table'], 'Product Feedback': ['feedback', 'suggestion', 'feature', 'missing', 'enhancement', 'improvement'], 'Campaign Hygiene': ['hygiene', 'remove', 'cap', 'capping', 'suppress', 'clean', 'exclude'], 'Security Documents': ['soc1', 'soc 2', 'security', 'compliance', 'report', 'access'], 'Exit Formalities': ['last working day', 'offboarding', 'exit', 'clearance', 'handover'], 'Onboarding Issues': ['onboarding', 'first login', 'credentials', 'setup', 'access', 'account'], 'Data Export/Download': ['download', 'csv', 'xls', 'export', 'extract', 'dump'], 'API Errors': ['api', 'token', 'unauthorized', 'auth', 'access denied', '403', '400', 'invalid'], 'Bounce/Delivery Errors': ['bounce', 'hard bounce', 'soft bounce', 'delivered', 'not reaching'], 'Template Issues': ['template', 'not approved', 'rejected', 'error', 'design', 'html'], 'Opt-out/Unsubscribe Issues': ['unsubscribe', 'opt-out', 'not working', 'spam complaint'], 'Feedback Loop or Complaint': ['fbl', 'feedback loop', 'spam report', 'complaint'], 'Rendering Issues': ['html', 'design', 'alignment', 'font', 'css', 'not displaying'], 'Blacklist or RBL Issues': ['rbl', 'blacklisted', 'block', 'spamhaus', 'dnsbl', 'uribl'], 'User Management': ['user', 'add user', 'remove user', 'roles', 'permissions', 'access'], 'Login/Access Issues': ['login', 'unauthorized', 'access', 'denied', 'credentials', 'authentication'], 'Campaign Scheduling': ['schedule', 'timing', 'calendar', 'automation', 'trigger', 'delay'], 'Mobile/Web Notifications': ['push', 'notification', 'app', 'web', 'in-app', 'not received'], 'DNS/DKIM/DMARC Issues': ['dmarc', 'dkim', 'spf', 'dns', 'not configured', 'fail']}
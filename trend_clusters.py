@@ -0,0 +1,146 @@
+# trend_clusters.py
+
+import os
+import pickle
+import numpy as np
+import scipy.sparse as sp
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.feature_extraction import FeatureHasher
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+from sklearn.utils import murmurhash3_32
+
+CLUSTER_MODEL_PATH = os.getenv("TICKET_ANALYZER_CLUSTER_MODEL", "trend_clusters.pkl")
+# Only used when a new model is created; an existing model keeps its cluster count
+N_CLUSTERS = int(os.getenv("TICKET_ANALYZER_CLUSTERS", "30"))
+N_FEATURES = 2 ** 16
+BATCH_SIZE = 10000
+LABEL_TERMS = 3
+UNCLUSTERED = "Unclustered"
+
+
+def _feature_index(term, n_features):
+    # Same bucket FeatureHasher puts the term in
+    h = murmurhash3_32(term, seed=0)
+    if h == -2147483648:
+        return (2147483647 - (n_features - 1)) % n_features
+    return abs(h) % n_features
+
+
+class TrendClusterer:
+    """Online k-means over hashed TF-IDF vectors of ticket text.
+
+    Hashing needs no vocabulary and the IDF is kept as running document frequencies,
+    so each run only vectorizes its own tickets and nudges the existing centroids with
+    partial_fit instead of refitting on the whole history.
+    """
+
+    def __init__(self, n_clusters=N_CLUSTERS, n_features=N_FEATURES):
+        self.n_clusters = n_clusters
+        self.n_features = n_features
+        self.doc_freq = np.zeros(n_features)
+        self.n_docs = 0
+        self.terms = {}
+        self.kmeans = MiniBatchKMeans(n_clusters=n_clusters, random_state=0, n_init=3, batch_size=1024)
+        self.fitted = False
+        # Term counts held back until there are enough tickets for the first fit
+        self.pending = None
+
+    @classmethod
+    def load(cls, path=CLUSTER_MODEL_PATH):
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        return cls()
+
+    def save(self, path=CLUSTER_MODEL_PATH):
+        # Written under a temporary name first so readers never see a half-written model
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    def _analyzer(self):
+        # Words of two or more letters, unigrams and bigrams; ticket numbers and dates are noise here
+        return HashingVectorizer(
+            ngram_range=(1, 2), stop_words="english", token_pattern=r"(?u)\b[a-zA-Z][a-zA-Z]+\b",
+        ).build_analyzer()
+
+    def _counts(self, texts, learn):
+        analyze = self._analyzer()
+        docs = [analyze(text or "") for text in texts]
+        if learn:
+            for term in set().union(*docs) if docs else ():
+                index = _feature_index(term, self.n_features)
+                self.terms.setdefault(index, term)
+        hasher = FeatureHasher(n_features=self.n_features, input_type="string", alternate_sign=False)
+        counts = sp.csr_matrix(hasher.transform(docs))
+        if learn:
+            self.doc_freq += np.bincount(counts.indices, minlength=self.n_features)
+            self.n_docs += counts.shape[0]
+        return counts
+
+    def _weights(self, counts):
+        idf = np.log((1 + self.n_docs) / (1 + self.doc_freq)) + 1
+        weighted = counts.copy()
+        weighted.data = np.log1p(weighted.data)
+        return normalize(weighted @ sp.diags(idf), copy=False)
+
+    def _assign(self, counts):
+        ids = np.full(counts.shape[0], -1)
+        if not self.fitted:
+            return ids
+        has_terms = np.diff(counts.indptr) > 0
+        if has_terms.any():
+            ids[has_terms] = self.kmeans.predict(self._weights(counts[has_terms]))
+        return ids
+
+    def update(self, texts, batch_size=BATCH_SIZE):
+        """Learn from `texts` and return their cluster ids (-1 if not clustered yet)."""
+        ids = []
+        for start in range(0, len(texts), batch_size):
+            counts = self._counts(texts[start:start + batch_size], learn=True)
+            train = counts[np.diff(counts.indptr) > 0]
+            if not self.fitted:
+                train = train if self.pending is None else sp.vstack([self.pending, train]).tocsr()
+                if train.shape[0] < self.n_clusters:
+                    self.pending = train
+                    ids.append(np.full(counts.shape[0], -1))
+                    continue
+                self.pending = None
+            if train.shape[0]:
+                self.kmeans.partial_fit(self._weights(train))
+                self.fitted = True
+            ids.append(self._assign(counts))
+        return [int(i) for i in np.concatenate(ids)] if ids else []
+
+    def predict(self, texts):
+        """Cluster ids for `texts` without updating the model."""
+        if not texts:
+            return []
+        return [int(i) for i in self._assign(self._counts(texts, learn=False))]
+
+    def labels(self, n_terms=LABEL_TERMS):
+        # Top-weighted terms of each centroid, e.g. "order, approval, submitted approval"
+        if not self.fitted:
+            return {}
+        labels = {}
+        for cluster, centroid in enumerate(self.kmeans.cluster_centers_):
+            terms = []
+            for index in np.argsort(centroid)[::-1]:
+                if centroid[index] <= 0 or len(terms) == n_terms:
+                    break
+                if index in self.terms:
+                    terms.append(self.terms[index])
+            labels[cluster] = ", ".join(terms) if terms else f"Cluster {cluster}"
+        return labels
+
+
+def cluster_label(cluster_id, labels):
+    if cluster_id is None or cluster_id < 0:
+        return UNCLUSTERED
+    return labels.get(cluster_id, f"Cluster {cluster_id}")
+
+
+def load_labels(path=CLUSTER_MODEL_PATH):
+    return TrendClusterer.load(path).labels() if os.path.exists(path) else {}
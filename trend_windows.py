@@ -0,0 +1,92 @@
+# trend_windows.py
+#
+# "Last N days", week-over-week and spike questions answered from the ticket store's rollups.
+
+import datetime
+import math
+import os
+
+UNMATCHED = "Unmatched"
+# Trailing 7-day windows before the current one that form the spike baseline
+SPIKE_BASELINE_WINDOWS = int(os.getenv("TICKET_ANALYZER_SPIKE_WINDOWS", "4"))
+# Standard deviations above the baseline mean that count as a spike
+SPIKE_Z = float(os.getenv("TICKET_ANALYZER_SPIKE_Z", "3"))
+SPIKE_MIN_TICKETS = int(os.getenv("TICKET_ANALYZER_SPIKE_MIN_TICKETS", "5"))
+
+
+def _day(value):
+    return datetime.date.fromisoformat(value)
+
+
+def _shift(day, days):
+    return (day + datetime.timedelta(days=days)).isoformat()
+
+
+def as_of_day(store, as_of=None):
+    # Windows end on the latest ticket day by default, so exports of past months still
+    # get meaningful "this week" numbers. `as_of` may be a date or a YYYY-MM-DD string.
+    if isinstance(as_of, datetime.date):
+        return as_of
+    if as_of:
+        return _day(as_of)
+    latest = store.latest_day()
+    return _day(latest) if latest else None
+
+
+def last_n_days(store, days, as_of=None, group_ids=None):
+    """(category, tickets) for the `days` days ending on `as_of` (inclusive)."""
+    end = as_of_day(store, as_of)
+    if end is None:
+        return []
+    rows = store.rollup_counts(
+        "category", since=_shift(end, -(days - 1)), until=_shift(end, 1), group_ids=group_ids
+    )
+    return [(category or UNMATCHED, n) for category, n in rows]
+
+
+def window_series(store, windows, window_days=7, as_of=None, group_ids=None):
+    # {category: [tickets per trailing window, oldest first]}; the last window ends on as_of
+    end = as_of_day(store, as_of)
+    if end is None:
+        return {}, None
+    first = end - datetime.timedelta(days=windows * window_days - 1)
+    series = {}
+    for day, category, n in store.daily_category_counts(
+        since=first.isoformat(), until=_shift(end, 1), group_ids=group_ids
+    ):
+        window = (_day(day) - first).days // window_days
+        series.setdefault(category or UNMATCHED, [0] * windows)[window] += n
+    return series, end
+
+
+def week_over_week(store, as_of=None, group_ids=None):
+    """(category, last 7 days, previous 7 days, % change) rows, largest current count first."""
+    series, _ = window_series(store, 2, as_of=as_of, group_ids=group_ids)
+    rows = []
+    for category, (previous, current) in series.items():
+        change = round(100 * (current - previous) / previous, 1) if previous else None
+        rows.append((category, current, previous, change))
+    return sorted(rows, key=lambda row: (-row[1], -row[2], row[0]))
+
+
+def detect_spikes(store, as_of=None, group_ids=None, baseline_windows=SPIKE_BASELINE_WINDOWS,
+                  z=SPIKE_Z, min_tickets=SPIKE_MIN_TICKETS):
+    """Categories whose last 7 days are far above their rolling baseline.
+
+    The baseline is the mean and standard deviation of the preceding `baseline_windows`
+    7-day windows. The deviation is floored at sqrt(mean) (a Poisson count's own noise)
+    and at 1, so quiet categories don't spike on a handful of tickets.
+    Returns (category, last 7 days, baseline mean, z-score) rows, strongest first.
+    """
+    series, _ = window_series(store, baseline_windows + 1, as_of=as_of, group_ids=group_ids)
+    spikes = []
+    for category, counts in series.items():
+        if category == UNMATCHED:
+            continue
+        *baseline, current = counts
+        mean = sum(baseline) / len(baseline)
+        std = math.sqrt(sum((n - mean) ** 2 for n in baseline) / len(baseline))
+        score = (current - mean) / max(std, math.sqrt(mean), 1)
+        if current >= min_tickets and score >= z:
+            spikes.append((category, current, round(mean, 1), round(score, 1)))
+    return sorted(spikes, key=lambda row: -row[3])
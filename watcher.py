@@ -0,0 +1,124 @@
+# watcher.py
+
+import os
+import queue
+import threading
+import time
+from parser import resolve_sources
+
+POLL_SECONDS = float(os.getenv("TICKET_ANALYZER_POLL_SECONDS", "30"))
+# Files waiting to be processed; the poller blocks once this many are queued
+QUEUE_SIZE = int(os.getenv("TICKET_ANALYZER_QUEUE_SIZE", "16"))
+# Files handed to one pipeline run
+BATCH_FILES = int(os.getenv("TICKET_ANALYZER_BATCH_FILES", "8"))
+# Minutes between rebuilds of the full-history artifacts while watching (0 = only on exit)
+REBUILD_MINUTES = float(os.getenv("TICKET_ANALYZER_REBUILD_MINUTES", "60"))
+# Delay before a failed or unfinished file is queued again; doubles on every retry of the same file
+RETRY_SECONDS = float(os.getenv("TICKET_ANALYZER_RETRY_SECONDS", "300"))
+RETRY_MAX_SECONDS = 3600
+
+
+class FolderWatcher:
+    """Polls a folder (or glob) for new or changed export files and queues them.
+
+    A file is queued only once its size and mtime are unchanged across two polls, so
+    exports still being copied in are never read half-written. The queue is bounded:
+    when processing falls behind, the poller blocks on it and stops scanning until
+    there is room again. Files handed back through retry() are queued again after a
+    delay even if they have not changed.
+    """
+
+    def __init__(self, pattern, interval=POLL_SECONDS, queue_size=QUEUE_SIZE, retry_seconds=RETRY_SECONDS):
+        self.pattern = pattern
+        self.interval = interval
+        self.retry_seconds = retry_seconds
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.stopped = threading.Event()
+        self._queued = {}
+        self._settling = {}
+        # path -> (attempts, monotonic time it is due); shared with the caller's thread
+        self._retries = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def poll(self):
+        for path in resolve_sources(self.pattern):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            stamp = (stat.st_size, stat.st_mtime_ns)
+            if self._queued.get(path) == stamp:
+                if self._retry_due(path):
+                    self._enqueue(path, stamp)
+                continue
+            if self._settling.get(path) != stamp:
+                # New or still growing; look again on the next poll
+                self._settling[path] = stamp
+                continue
+            del self._settling[path]
+            with self._lock:
+                # A changed file starts over, without any pending retry
+                self._retries.pop(path, None)
+            self._enqueue(path, stamp)
+
+    def _enqueue(self, path, stamp):
+        while not self.stopped.is_set():
+            try:
+                self.queue.put(path, timeout=1)
+                self._queued[path] = stamp
+                break
+            except queue.Full:
+                continue
+
+    def _retry_due(self, path):
+        with self._lock:
+            retry = self._retries.get(path)
+            if retry is None or retry[1] is None or retry[1] > time.monotonic():
+                return False
+            self._retries[path] = (retry[0], None)
+            return True
+
+    def retry(self, paths):
+        # Queue these files again after a delay, changed or not: their run failed or left
+        # tickets without summaries. The delay doubles with each retry of the same file, up
+        # to RETRY_MAX_SECONDS, and starts over once the file changes. Returns the delays.
+        delays = {}
+        with self._lock:
+            for path in paths:
+                attempts = self._retries.get(path, (0, None))[0] + 1
+                delays[path] = min(self.retry_seconds * 2 ** (attempts - 1), RETRY_MAX_SECONDS)
+                self._retries[path] = (attempts, time.monotonic() + delays[path])
+        return delays
+
+    def _run(self):
+        while not self.stopped.is_set():
+            self.poll()
+            self.stopped.wait(self.interval)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="folder-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def batches(self, max_files=BATCH_FILES, idle=None):
+        # Yields lists of up to max_files queued paths as they arrive, until stopped. With
+        # `idle`, an empty list is yielded after every `idle` seconds without new files, so
+        # the caller can do periodic work.
+        while not self.stopped.is_set():
+            try:
+                batch = [self.queue.get(timeout=idle or 1)]
+            except queue.Empty:
+                if idle:
+                    yield []
+                continue
+            while len(batch) < max_files:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            yield batch